@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Benchmarks du générateur de heatmaps
+
+Trois commandes :
+    moteurs  : compare le temps de rendu par heatmap entre le moteur
+               matplotlib standard et les autres moteurs de MOTEURS_RENDU,
+               sur des matrices synthétiques de même forme
+    etapes   : génère des fichiers synthétiques (format Marqueur_Groupe_Réplicat,
+               CSV et/ou Excel) et mesure la durée et le pic mémoire de chaque
+               étape du HeatmapGenerator ; résultats écrits en JSON
+    comparer : compare deux fichiers JSON produits par 'etapes' (ex. avant et
+               après une mise à jour) et signale les régressions
+
+Utilisation:
+    python benchmark_heatmaps.py moteurs --marqueurs 50 --valeurs-x 12 --groupes 6
+    python benchmark_heatmaps.py etapes --marqueurs 10 100 --formats csv xlsx -o actuel.json
+    python benchmark_heatmaps.py comparer reference.json actuel.json --seuil 1.2
+"""
+
+import argparse
+import contextlib
+import datetime
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import matplotlib
+import numpy as np
+import pandas as pd
+
+from heatmap_generator_generic_v2 import (MOTEURS_RENDU, HeatmapGenerator, _schema_en_cache,
+                                          analyser_colonnes, lire_tableau, rendre_heatmap)
+
+# Étapes mesurées, dans l'ordre d'exécution
+# (lecture, nettoyage et schéma détaillent le coût du chargement)
+ETAPES_MESUREES = ('lecture', 'nettoyage', 'schema', 'chargement', 'matrices',
+                   'transformation', 'rendu', 'assemblage')
+
+
+def mesurer_rendu(moteur, matrices, valeurs_x, groupes, config, afficher_valeurs, palette):
+    """
+    Rend toutes les matrices avec un moteur et retourne la durée totale (s)
+    """
+    config = dict(config, moteur_rendu=moteur)
+    debut = time.perf_counter()
+    for k, matrice in enumerate(matrices):
+        rendre_heatmap(matrice, f"M{k}", valeurs_x, groupes, 'X', config,
+                       afficher_valeurs, palette)
+    return time.perf_counter() - debut
+
+
+def generer_jeu_donnees(chemin, n_marqueurs, n_groupes, n_replicats, n_valeurs_x, graine=0):
+    """
+    Écrit un fichier synthétique au format Marqueur_Groupe_Réplicat
+
+    Le format (CSV ou Excel) est déduit de l'extension. La première colonne
+    contient les valeurs X ('0h', '2h', ...) ; chaque marqueur a un niveau de
+    base et un effet par groupe, avec environ 2 % de valeurs manquantes.
+
+    Retourne:
+        int: Taille du fichier écrit (octets)
+    """
+    rng = np.random.default_rng(graine)
+    n_colonnes = n_marqueurs * n_groupes * n_replicats
+
+    base = rng.gamma(2, 20, (1, n_marqueurs, 1, 1))
+    effet_groupe = rng.lognormal(0, 0.5, (1, n_marqueurs, n_groupes, 1))
+    effet_x = np.linspace(1, 3, n_valeurs_x).reshape(-1, 1, 1, 1)
+    bruit = rng.lognormal(0, 0.2, (n_valeurs_x, n_marqueurs, n_groupes, n_replicats))
+    valeurs = (base * effet_groupe * effet_x * bruit).reshape(n_valeurs_x, n_colonnes)
+    valeurs[rng.random(valeurs.shape) < 0.02] = np.nan
+
+    colonnes = [f"Mk{m}_G{g}_{r + 1}" for m in range(n_marqueurs)
+                for g in range(n_groupes) for r in range(n_replicats)]
+    df = pd.DataFrame(valeurs.round(2), columns=colonnes)
+    df.insert(0, 'Temps', [f"{2 * i}h" for i in range(n_valeurs_x)])
+
+    if chemin.endswith('.csv'):
+        df.to_csv(chemin, index=False)
+    else:
+        df.to_excel(chemin, sheet_name='Données', index=False)
+    return os.path.getsize(chemin)
+
+
+class Chronometre:
+    """
+    Mesure la durée et le pic mémoire (tracemalloc) de blocs successifs
+    """
+
+    def __init__(self, memoire=True):
+        self.memoire = memoire
+        self.mesures = {}
+
+    @contextlib.contextmanager
+    def etape(self, nom):
+        if self.memoire:
+            tracemalloc.start()
+        debut = time.perf_counter()
+        try:
+            yield
+        finally:
+            mesure = {'duree_s': time.perf_counter() - debut}
+            if self.memoire:
+                mesure['memoire_pic_octets'] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            self.mesures[nom] = mesure
+
+
+def mesurer_etapes(chemin, config, memoire=True):
+    """
+    Exécute chaque étape du générateur sur un fichier et mesure durée et pic mémoire
+
+    Retourne:
+        dict: {étape: {'duree_s', 'memoire_pic_octets'}} et les tailles traitées
+    """
+    chrono = Chronometre(memoire)
+
+    # Détail du chargement : lecture brute, nettoyage des lignes, analyse des colonnes
+    with chrono.etape('lecture'):
+        df = lire_tableau(chemin, afficher=None)
+    colonne_x = df.columns[0]
+    with chrono.etape('nettoyage'):
+        df = HeatmapGenerator._nettoyer_lignes(df, colonne_x)
+    _schema_en_cache.cache_clear()
+    with chrono.etape('schema'):
+        analyser_colonnes(df.columns, colonne_x)
+    _schema_en_cache.cache_clear()
+
+    generator = HeatmapGenerator(chemin, dict(config))
+    with chrono.etape('chargement'):
+        generator.charger_donnees()
+    with chrono.etape('matrices'):
+        generator.calculer_matrices()
+    with chrono.etape('transformation'):
+        generator.transformer_matrices()
+    with chrono.etape('rendu'):
+        generator.rendre_heatmaps()
+
+    with tempfile.TemporaryDirectory() as dossier:
+        sortie = os.path.join(dossier, 'benchmark.pptx')
+        with chrono.etape('assemblage'):
+            generator.creer_presentation(sortie)
+        taille_pptx = os.path.getsize(sortie)
+
+    return {
+        'etapes': chrono.mesures,
+        'lignes': len(generator.valeurs_x),
+        'marqueurs_detectes': len(generator.marqueurs),
+        'octets_images': sum(len(png) for png in generator.images.values()),
+        'octets_pptx': taille_pptx,
+    }
+
+
+def environnement():
+    """
+    Versions et machine, pour comparer des résultats obtenus entre versions
+    """
+    return {
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plateforme': platform.platform(),
+        'processeurs': os.cpu_count(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'matplotlib': matplotlib.__version__,
+    }
+
+
+def commande_moteurs(args):
+    rng = np.random.default_rng(0)
+    matrices = [rng.gamma(2, 20, (args.valeurs_x, args.groupes)) for _ in range(args.marqueurs)]
+    valeurs_x = [f"{2 * i}h" for i in range(args.valeurs_x)]
+    groupes = [f"G{j}" for j in range(args.groupes)]
+    config = {'echelle_log': True, 'taille_heatmap': (3.5, 4), 'dpi': args.dpi}
+    afficher_valeurs = not args.sans_valeurs
+
+    print(f"{args.marqueurs} heatmaps {args.valeurs_x}×{args.groupes}, "
+          f"valeurs {'affichées' if afficher_valeurs else 'masquées'}\n")
+
+    reference = None
+    for moteur in MOTEURS_RENDU:
+        duree = mesurer_rendu(moteur, matrices, valeurs_x, groupes, config,
+                              afficher_valeurs, args.palette)
+        par_heatmap = 1000 * duree / args.marqueurs
+        if reference is None:
+            reference = duree
+        print(f"  {moteur:<15} : {duree:7.2f} s  ({par_heatmap:6.1f} ms/heatmap, "
+              f"×{reference / duree:.1f})")
+
+
+def commande_etapes(args):
+    config = {
+        'verbeux': False,
+        'moteur_rendu': args.moteur,
+        'afficher_valeurs': not args.sans_valeurs,
+        'processus_rendu': args.processus,
+        'dpi': args.dpi,
+    }
+    resultats = []
+
+    cas_mesures = itertools.product(args.formats, args.marqueurs, args.groupes,
+                                    args.replicats, args.valeurs_x)
+    with tempfile.TemporaryDirectory() as dossier:
+        for fmt, n_marqueurs, n_groupes, n_replicats, n_valeurs_x in cas_mesures:
+            chemin = os.path.join(dossier, f"synthetique.{fmt}")
+            taille = generer_jeu_donnees(chemin, n_marqueurs, n_groupes, n_replicats, n_valeurs_x)
+
+            # Meilleure mesure sur les répétitions (moins sensible au bruit)
+            mesures = [mesurer_etapes(chemin, config, not args.sans_memoire)
+                       for _ in range(args.repetitions)]
+            resultat = {'format': fmt, 'marqueurs': n_marqueurs, 'groupes': n_groupes,
+                        'replicats': n_replicats, 'valeurs_x': n_valeurs_x,
+                        'octets_fichier': taille}
+            resultat.update((cle, valeur) for cle, valeur in mesures[0].items() if cle != 'etapes')
+            resultat['etapes'] = {
+                etape: {cle: min(m['etapes'][etape][cle] for m in mesures)
+                        for cle in mesures[0]['etapes'][etape]}
+                for etape in ETAPES_MESUREES
+            }
+            resultats.append(resultat)
+
+            print(f"{fmt:<5} {n_marqueurs:>5} marqueurs × {n_groupes} groupes × "
+                  f"{n_replicats} réplicats × {n_valeurs_x} valeurs X ({taille / 1024:.0f} Ko)")
+            for etape, mesure in resultat['etapes'].items():
+                ligne = f"    {etape:<15} : {mesure['duree_s']:8.3f} s"
+                if 'memoire_pic_octets' in mesure:
+                    ligne += f"  (pic {mesure['memoire_pic_octets'] / 1024 ** 2:7.1f} Mo)"
+                print(ligne)
+
+    rapport = {'environnement': environnement(), 'config': config,
+               'repetitions': args.repetitions, 'resultats': resultats}
+    if args.sortie:
+        with open(args.sortie, 'w', encoding='utf-8') as f:
+            json.dump(rapport, f, indent=2, ensure_ascii=False)
+        print(f"\n✓ Résultats écrits : {args.sortie}")
+
+
+def commande_comparer(args):
+    def charger(chemin):
+        with open(chemin, encoding='utf-8') as f:
+            rapport = json.load(f)
+        return {(r['format'], r['marqueurs'], r['groupes'], r['replicats'], r['valeurs_x']): r
+                for r in rapport['resultats']}
+
+    reference, actuel = charger(args.reference), charger(args.actuel)
+    regressions = 0
+    for cas in reference:
+        if cas not in actuel:
+            continue
+        print("{} {} marqueurs × {} groupes × {} réplicats × {} valeurs X".format(*cas))
+        for etape, mesure in actuel[cas]['etapes'].items():
+            avant = reference[cas]['etapes'].get(etape)
+            if avant is None:
+                continue
+            rapport = mesure['duree_s'] / max(avant['duree_s'], 1e-9)
+            # Les étapes très courtes sont trop bruitées pour conclure
+            regression = rapport > args.seuil and mesure['duree_s'] > args.duree_min
+            regressions += regression
+            print(f"    {etape:<15} : {avant['duree_s']:8.3f} s -> {mesure['duree_s']:8.3f} s "
+                  f"(×{rapport:.2f}){'  ⚠️ RÉGRESSION' if regression else ''}")
+
+    print(f"\n{regressions} régression(s) au-delà de ×{args.seuil}")
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks du générateur de heatmaps")
+    commandes = parser.add_subparsers(dest='commande', required=True)
+
+    moteurs = commandes.add_parser('moteurs', help="Comparer les moteurs de rendu")
+    moteurs.add_argument('--marqueurs', type=int, default=30)
+    moteurs.add_argument('--valeurs-x', type=int, default=8)
+    moteurs.add_argument('--groupes', type=int, default=4)
+    moteurs.add_argument('--sans-valeurs', action='store_true', help="Masquer les annotations")
+    moteurs.add_argument('--palette', default='rouge')
+    moteurs.add_argument('--dpi', type=int, default=150)
+    moteurs.set_defaults(executer=commande_moteurs)
+
+    etapes = commandes.add_parser('etapes', help="Mesurer chaque étape sur des fichiers synthétiques")
+    etapes.add_argument('--formats', nargs='+', choices=['csv', 'xlsx'], default=['csv'])
+    etapes.add_argument('--marqueurs', type=int, nargs='+', default=[20])
+    etapes.add_argument('--groupes', type=int, nargs='+', default=[4])
+    etapes.add_argument('--replicats', type=int, nargs='+', default=[3])
+    etapes.add_argument('--valeurs-x', type=int, nargs='+', default=[8])
+    etapes.add_argument('--repetitions', type=int, default=1,
+                        help="Nombre d'exécutions par cas (la meilleure mesure est retenue)")
+    etapes.add_argument('--moteur', choices=sorted(MOTEURS_RENDU), default='matplotlib')
+    etapes.add_argument('--processus', type=int, default=1)
+    etapes.add_argument('--sans-valeurs', action='store_true', help="Masquer les annotations")
+    etapes.add_argument('--dpi', type=int, default=150)
+    etapes.add_argument('--sans-memoire', action='store_true',
+                        help="Ne pas mesurer le pic mémoire (tracemalloc ralentit les mesures)")
+    etapes.add_argument('-o', '--sortie', help="Fichier JSON des résultats")
+    etapes.set_defaults(executer=commande_etapes)
+
+    comparer = commandes.add_parser('comparer', help="Comparer deux résultats JSON")
+    comparer.add_argument('reference')
+    comparer.add_argument('actuel')
+    comparer.add_argument('--seuil', type=float, default=1.2,
+                          help="Rapport de durée au-delà duquel une étape est en régression")
+    comparer.add_argument('--duree-min', type=float, default=0.05,
+                          help="Durée (s) en dessous de laquelle une étape n'est pas jugée")
+    comparer.set_defaults(executer=commande_comparer)
+
+    args = parser.parse_args(argv)
+    return args.executer(args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
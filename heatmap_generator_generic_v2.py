@@ -14,43 +14,1823 @@ Version: 2.0 - Ultra-flexible
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.artist import Artist
+from matplotlib.collections import LineCollection
 from matplotlib.colors import LinearSegmentedColormap
+from matplotlib.text import Text
+from matplotlib.figure import Figure
+from matplotlib.transforms import Bbox
+from matplotlib.layout_engine import TightLayoutEngine
+from matplotlib.font_manager import FontProperties, findfont, get_font
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from scipy.cluster.hierarchy import dendrogram, leaves_list, linkage
+from scipy.spatial.distance import pdist
 from pptx import Presentation
-from pptx.util import Inches
+from pptx.dml.color import RGBColor
+from pptx.enum.shapes import MSO_SHAPE
+from pptx.enum.text import MSO_ANCHOR, PP_ALIGN
+from pptx.util import Emu, Inches, Pt
 from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache, wraps
+from collections import OrderedDict, deque
+import argparse
+import contextlib
+import gc
+import glob
+import hashlib
+import json
+import logging
+import os
+import struct
+import sys
+import threading
+import time
+import zipfile
+import zlib
 import warnings
 warnings.filterwarnings('ignore')
 
 
+SEPARATEURS = ('_', '-', '.')
+
+
+class SchemaColonnes:
+    """
+    Structure des colonnes d'un fichier au format Marqueur_Groupe_Réplicat
+    
+    Produit une seule fois par analyser_colonnes() puis partagé par toutes
+    les étapes (détection, calcul des matrices, prévisualisation).
+    
+    Attributs:
+        colonnes (tuple): En-têtes d'origine, dans l'ordre du fichier
+        colonne_x (str): Colonne X exclue de l'analyse
+        marqueur, groupe, replicat (tuple): Décomposition de chaque colonne
+            (None si la colonne n'a pas de séparateur)
+        marqueurs (tuple): Marqueurs détectés, triés
+        groupes (tuple): Groupes détectés (hors numéros de réplicat), triés
+        positions (ndarray): Position des colonnes de données retenues
+        codes_marqueurs, codes_groupes (ndarray): Index dans marqueurs / groupes
+        rangs_replicats (ndarray): Rang du réplicat au sein de (marqueur, groupe)
+        n_replicats (int): Nombre maximal de réplicats par (marqueur, groupe)
+    """
+    
+    def __init__(self, colonnes, colonne_x=None):
+        self.colonnes = tuple(colonnes)
+        self.colonne_x = colonne_x
+        
+        marqueur, groupe, replicat = [], [], []
+        for col in self.colonnes:
+            parties = None
+            if col != colonne_x and isinstance(col, str):
+                for sep in SEPARATEURS:
+                    if sep in col:
+                        parties = col.split(sep, 2)
+                        break
+            if parties is None:
+                marqueur.append(None)
+                groupe.append(None)
+                replicat.append(None)
+            else:
+                marqueur.append(parties[0])
+                groupe.append(parties[1])
+                replicat.append(parties[2] if len(parties) > 2 else None)
+        
+        self.marqueur = tuple(marqueur)
+        self.groupe = tuple(groupe)
+        self.replicat = tuple(replicat)
+        
+        self.marqueurs = tuple(sorted({m for m in marqueur if m is not None}))
+        self.groupes = tuple(sorted({g for g in groupe if g is not None and not g.isdigit()}))
+        
+        # Index des colonnes de données (marqueur et groupe valides)
+        index_marqueurs = {m: k for k, m in enumerate(self.marqueurs)}
+        index_groupes = {g: k for k, g in enumerate(self.groupes)}
+        positions, codes_marqueurs, codes_groupes, rangs = [], [], [], []
+        compteurs = {}
+        for position, (m, g) in enumerate(zip(marqueur, groupe)):
+            if m is None or g not in index_groupes:
+                continue
+            cle = (index_marqueurs[m], index_groupes[g])
+            positions.append(position)
+            codes_marqueurs.append(cle[0])
+            codes_groupes.append(cle[1])
+            rangs.append(compteurs.get(cle, 0))
+            compteurs[cle] = rangs[-1] + 1
+        
+        self.positions = self._tableau(positions)
+        self.codes_marqueurs = self._tableau(codes_marqueurs)
+        self.codes_groupes = self._tableau(codes_groupes)
+        self.rangs_replicats = self._tableau(rangs)
+        self.n_replicats = max(compteurs.values(), default=0)
+    
+    @staticmethod
+    def _tableau(valeurs):
+        # Le schéma est partagé via le cache : tableaux en lecture seule
+        tableau = np.asarray(valeurs, dtype=np.intp)
+        tableau.setflags(write=False)
+        return tableau
+    
+    def colonnes_marqueur(self, marqueur, groupe=None):
+        """
+        Retourne les colonnes d'un marqueur (et éventuellement d'un groupe)
+        """
+        return [col for col, m, g in zip(self.colonnes, self.marqueur, self.groupe)
+                if m == marqueur and (groupe is None or g == groupe)]
+
+
+@lru_cache(maxsize=32)
+def _schema_en_cache(colonnes, colonne_x):
+    return SchemaColonnes(colonnes, colonne_x)
+
+
+def analyser_colonnes(colonnes, colonne_x=None):
+    """
+    Analyse la ligne d'en-tête et retourne son SchemaColonnes
+    
+    Le résultat est mis en cache par en-tête : un nouveau fichier avec la
+    même disposition de plaque réutilise le schéma sans nouvelle analyse.
+    
+    Paramètres:
+        colonnes (iterable): En-têtes de colonnes (ex: df.columns)
+        colonne_x (str): Colonne X à exclure de l'analyse
+    """
+    return _schema_en_cache(tuple(colonnes), colonne_x)
+
+
+def _tenseur_replicats(valeurs, schema):
+    """
+    Range les valeurs (lignes × colonnes retenues du schéma) dans un tenseur
+    dense (marqueur, ligne, groupe, réplicat) ; NaN = réplicat absent
+    """
+    tenseur = np.full((len(schema.marqueurs), valeurs.shape[0], len(schema.groupes),
+                       schema.n_replicats), np.nan)
+    tenseur[schema.codes_marqueurs, :, schema.codes_groupes, schema.rangs_replicats] = valeurs.T
+    return tenseur
+
+
+# Statistiques calculées sur les réplicats de chaque cellule (marqueur, valeur X, groupe)
+STATISTIQUES = ('moyenne', 'mediane', 'ecart_type', 'sem', 'n')
+
+
+def _segments_lignes(codes_x):
+    """
+    Lignes triées par valeur X (tri stable) et début de chaque segment
+
+    Retourne:
+        tuple: (ordre des lignes, débuts des segments, code X de chaque segment)
+    """
+    codes_x = np.asarray(codes_x, dtype=np.intp)
+    ordre = np.argsort(codes_x, kind='stable')
+    tries = codes_x[ordre]
+    debuts = np.flatnonzero(np.r_[True, tries[1:] != tries[:-1]]) if len(tries) \
+        else np.zeros(0, dtype=np.intp)
+    return ordre, debuts, tries[debuts]
+
+
+def _sommer_lignes(valeurs, codes_x, n_x):
+    """
+    Somme les lignes (axe 1) d'une même valeur X : (marqueur, ligne, groupe)
+    devient (marqueur, valeur_x, groupe), par np.add.reduceat sur les lignes
+    triées (aucun remplissage : la taille suit le nombre de lignes)
+    """
+    ordre, debuts, codes = _segments_lignes(codes_x)
+    sommes = np.zeros((valeurs.shape[0], n_x) + valeurs.shape[2:], dtype=valeurs.dtype)
+    if len(ordre):
+        sommes[:, codes] = np.add.reduceat(valeurs[:, ordre], debuts, axis=1)
+    return sommes
+
+
+def _moments_replicats(tenseur, codes_x, n_x):
+    """
+    Réduit le tenseur (marqueur, ligne, groupe, réplicat) en (effectifs,
+    sommes, sommes des carrés des écarts à la moyenne) par (marqueur,
+    valeur_x, groupe) : les réplicats des lignes d'une même valeur X sont mis
+    en commun, les NaN ignorés
+    """
+    presents = ~np.isnan(tenseur)
+    effectifs = _sommer_lignes(presents.sum(axis=3), codes_x, n_x)
+    sommes = _sommer_lignes(np.where(presents, tenseur, 0.0).sum(axis=3), codes_x, n_x)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        moyennes = sommes / effectifs
+    ecarts = np.where(presents, tenseur - moyennes[:, codes_x, :, None], 0.0)
+    return effectifs, sommes, _sommer_lignes((ecarts ** 2).sum(axis=3), codes_x, n_x)
+
+
+def _statistiques_moments(effectifs, sommes, m2):
+    """
+    Statistiques (sauf la médiane) depuis les moments d'ordre 0 à 2
+
+    Moyenne NaN sans réplicat ; écart-type (n - 1) et SEM NaN sous 2 réplicats.
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        moyennes = np.where(effectifs > 0, sommes / effectifs, np.nan)
+        ecarts_types = np.where(effectifs > 1, np.sqrt(m2 / (effectifs - 1)), np.nan)
+        sem = ecarts_types / np.sqrt(effectifs)
+    return {'moyenne': moyennes, 'ecart_type': ecarts_types, 'sem': sem, 'n': effectifs}
+
+
+def _medianes_replicats(tenseur, codes_x, n_x):
+    """
+    Médiane des réplicats mis en commun par (marqueur, valeur_x, groupe)
+
+    Les valeurs X sont traitées par nombre de lignes : seules celles qui ont
+    le même nombre de doublons sont empilées ensemble, sans remplissage.
+    """
+    n_marqueurs, _, n_groupes, n_replicats = tenseur.shape
+    medianes = np.full((n_marqueurs, n_x, n_groupes), np.nan)
+    ordre, debuts, codes = _segments_lignes(codes_x)
+    tailles = np.diff(np.r_[debuts, len(ordre)])
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # cellules sans réplicat
+        for taille in np.unique(tailles):
+            segments = np.flatnonzero(tailles == taille)
+            lignes = ordre[debuts[segments][:, None] + np.arange(taille)]
+            # (marqueur, segment, ligne, groupe, réplicat) → (marqueur, segment, groupe, ligne × réplicat)
+            valeurs = tenseur[:, lignes].transpose(0, 1, 3, 2, 4).reshape(
+                n_marqueurs, len(segments), n_groupes, taille * n_replicats)
+            medianes[:, codes[segments]] = np.nanmedian(valeurs, axis=3)
+    return medianes
+
+
+def _agreger_replicats(tenseur, codes_x, n_x):
+    """
+    Calcule toutes les STATISTIQUES par (marqueur, valeur_x, groupe), en une passe
+
+    Les lignes d'une même valeur X (codes_x identiques) sont mises en commun.
+
+    Retourne:
+        dict: Associe à chaque nom un tenseur (marqueur, valeur_x, groupe)
+    """
+    statistiques = _statistiques_moments(*_moments_replicats(tenseur, codes_x, n_x))
+    statistiques['mediane'] = _medianes_replicats(tenseur, codes_x, n_x)
+    return statistiques
+
+
+# Palettes : liste de couleurs, ou nom d'une colormap matplotlib échantillonnée
+_PALETTES = {
+    'rouge': ['#FFFFFF', '#FFF5E6', '#FFE6CC', '#FFD9B3', '#FFCC99', 
+              '#FFB366', '#FF9933', '#FF8000', '#E67300', '#CC6600',
+              '#B35900', '#994C00', '#803F00'],
+    'bleu': ['#FFFFFF', '#E6F2FF', '#CCE5FF', '#B3D9FF', '#99CCFF',
+             '#80BFFF', '#66B3FF', '#4DA6FF', '#3399FF', '#1A8CFF',
+             '#0080FF', '#0073E6', '#0066CC'],
+    'vert': ['#FFFFFF', '#E6F9E6', '#CCF2CC', '#B3ECB3', '#99E699',
+             '#80DF80', '#66D966', '#4DD34D', '#33CC33', '#1AC61A',
+             '#00BF00', '#00B300', '#00A600'],
+    'viridis': 'viridis',
+    'plasma': 'plasma',
+    'inferno': 'inferno',
+    'magma': 'magma',
+    'cividis': 'cividis',
+}
+_COLORMAPS = {}
+_LUTS = {}
+_PALETTES_VERROU = threading.Lock()
+
+
+def palettes_disponibles():
+    """
+    Retourne les noms des palettes enregistrées
+    """
+    return list(_PALETTES)
+
+
+def enregistrer_palette(nom, couleurs):
+    """
+    Enregistre (ou remplace) une palette personnalisée
+    
+    Paramètres:
+        nom (str): Nom de la palette (ex: 'gris')
+        couleurs: Liste de couleurs matplotlib (du minimum au maximum)
+                  ou nom d'une colormap matplotlib
+    """
+    with _PALETTES_VERROU:
+        _PALETTES[nom] = couleurs
+        _COLORMAPS.pop(nom, None)
+        _LUTS.pop(nom, None)
+    # Les gabarits et calques mis en cache référencent la palette par son nom
+    with _GABARITS_VERROU:
+        _GABARITS.clear()
+    _calque_raster.cache_clear()
+
+
+def obtenir_colormap(nom):
+    """
+    Retourne la colormap d'une palette, construite une seule fois à la demande
+    """
+    cmap = _COLORMAPS.get(nom)
+    if cmap is None:
+        if nom not in _PALETTES:
+            raise ValueError(f"Palette inconnue : '{nom}'. "
+                             f"Palettes disponibles : {palettes_disponibles()}")
+        couleurs = _PALETTES[nom]
+        if isinstance(couleurs, str):
+            couleurs = plt.get_cmap(couleurs)(np.linspace(0, 1, 13))
+        cmap = LinearSegmentedColormap.from_list(nom, couleurs, N=100)
+        with _PALETTES_VERROU:
+            cmap = _COLORMAPS.setdefault(nom, cmap)
+    return cmap
+
+
+def obtenir_lut(nom):
+    """
+    Retourne la table de correspondance 256 × RGBA (uint8) d'une palette
+    """
+    lut = _LUTS.get(nom)
+    if lut is None:
+        lut = np.round(obtenir_colormap(nom)(np.linspace(0, 1, 256)) * 255).astype(np.uint8)
+        lut.setflags(write=False)
+        with _PALETTES_VERROU:
+            lut = _LUTS.setdefault(nom, lut)
+    return lut
+
+
+def transformer_valeurs(valeurs, config):
+    """
+    Valeurs utilisées pour les couleurs : log10(valeur + 1) si config['echelle_log']
+    
+    Opération vectorisée : s'applique à une matrice comme au tenseur
+    (marqueur, valeur_x, groupe) de tous les marqueurs.
+    """
+    if config['echelle_log']:
+        return np.log10(valeurs + 1)
+    return valeurs
+
+
+# Normalisations par marqueur des valeurs des couleurs (remplacent l'échelle log)
+NORMALISATIONS = {
+    'zscore_lignes': 'z-score par valeur X',
+    'zscore_colonnes': 'z-score par groupe',
+    'minmax': 'min-max',
+    'fold_change': 'fold change',
+    'log2_fold_change': 'log₂ fold change',
+}
+FOLD_CHANGES = ('fold_change', 'log2_fold_change')
+
+
+def normaliser(tenseur, mode, reference=None):
+    """
+    Normalise des matrices [valeurs_x × groupes], chacune indépendamment
+    
+    Opération vectorisée sur les deux derniers axes : s'applique à une
+    matrice comme au tenseur (marqueur, valeur_x, groupe) de tous les
+    marqueurs en une fois. Les NaN (cellules vides) sont ignorés et conservés.
+    
+    Paramètres:
+        tenseur (ndarray): Matrice ou tenseur de matrices
+        mode (str): Clé de NORMALISATIONS
+                    - 'zscore_lignes' / 'zscore_colonnes' : (x - moyenne) / écart-type
+                      de chaque ligne (valeur X) / colonne (groupe)
+                    - 'minmax' : ramené entre 0 et 1 sur toute la matrice
+                    - 'fold_change' / 'log2_fold_change' : rapport (log₂) à la
+                      colonne ou à la ligne de référence
+        reference (tuple): Fold changes : ('groupe', indice de colonne) ou
+                           ('x', indice de ligne)
+    """
+    if mode not in NORMALISATIONS:
+        raise ValueError(f"Normalisation inconnue : '{mode}'. "
+                         f"Normalisations disponibles : {list(NORMALISATIONS)}")
+    
+    with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # lignes ou matrices entièrement vides
+        if mode in ('zscore_lignes', 'zscore_colonnes'):
+            axe = -1 if mode == 'zscore_lignes' else -2
+            moyennes = np.nanmean(tenseur, axis=axe, keepdims=True)
+            ecarts = np.nanstd(tenseur, axis=axe, keepdims=True)
+            # Écart-type nul : toutes les valeurs égales à la moyenne, z-score 0
+            return (tenseur - moyennes) / np.where(ecarts > 0, ecarts, 1.0)
+        
+        if mode == 'minmax':
+            minimums = np.nanmin(tenseur, axis=(-2, -1), keepdims=True)
+            etendues = np.nanmax(tenseur, axis=(-2, -1), keepdims=True) - minimums
+            return (tenseur - minimums) / np.where(etendues > 0, etendues, 1.0)
+        
+        if reference is None:
+            raise ValueError(f"La normalisation '{mode}' exige une référence (groupe ou valeur X)")
+        axe, indice = reference
+        if axe == 'groupe':
+            references = tenseur[..., indice:indice + 1]
+        else:
+            references = tenseur[..., indice:indice + 1, :]
+        rapports = tenseur / references
+        rapports[~np.isfinite(rapports)] = np.nan  # référence nulle ou absente
+        if mode == 'log2_fold_change':
+            return np.log2(np.where(rapports > 0, rapports, np.nan))
+        return rapports
+
+
+def libelle_echelle(config):
+    """
+    Légende de l'échelle des couleurs : normalisation, échelle log ou valeurs brutes
+    """
+    mode = config.get('normalisation')
+    if mode:
+        libelle = NORMALISATIONS[mode]
+        if mode in FOLD_CHANGES:
+            for cle in ('groupe_reference', 'x_reference'):
+                if config.get(cle) is not None:
+                    libelle += f" / {config[cle]}"
+        return libelle
+    return 'log₁₀(valeur + 1)' if config['echelle_log'] else 'Valeur'
+
+
+# Regroupement hiérarchique (scipy.cluster.hierarchy)
+METHODES_CLUSTERING = ('average', 'complete', 'single', 'ward')
+METRIQUES_CLUSTERING = ('euclidean', 'correlation')
+
+_LIAISONS = OrderedDict()
+_LIAISONS_MAX = 20000
+_LIAISONS_VERROU = threading.Lock()
+
+
+def _distances_lot(tenseur, metrique):
+    """
+    Distances condensées entre les lignes de chaque matrice d'un lot (n, p, q)
+    
+    Toutes les matrices sont traitées en une passe (produits matriciels par
+    lot) ; une matrice seule (ex : tous les marqueurs) passe par pdist, qui
+    n'alloue que la forme condensée. Les NaN sont remplacés par la moyenne
+    de leur matrice.
+    
+    Retourne:
+        ndarray: (n, p × (p - 1) / 2)
+    """
+    manquantes = np.isnan(tenseur)
+    if manquantes.any():
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            moyennes = np.nanmean(tenseur.reshape(len(tenseur), -1), axis=1)
+        tenseur = np.where(manquantes, np.nan_to_num(moyennes)[:, None, None], tenseur)
+    
+    if len(tenseur) == 1:
+        # Lignes constantes en corrélation : distance 1, comme ci-dessous
+        return np.nan_to_num(pdist(tenseur[0], metrique), nan=1.0)[None]
+    
+    if metrique == 'correlation':
+        centre = tenseur - tenseur.mean(axis=2, keepdims=True)
+        normes = np.linalg.norm(centre, axis=2, keepdims=True)
+        centre = np.divide(centre, normes, out=np.zeros_like(centre), where=normes > 0)
+        distances = 1 - centre @ centre.transpose(0, 2, 1)
+    else:
+        carres = (tenseur ** 2).sum(axis=2)
+        distances = np.sqrt(np.maximum(
+            carres[:, :, None] + carres[:, None, :] - 2 * tenseur @ tenseur.transpose(0, 2, 1), 0))
+    i, j = np.triu_indices(tenseur.shape[1], 1)
+    return np.maximum(distances[:, i, j], 0)
+
+
+def calculer_liaisons(tenseur, methode='average', metrique='euclidean'):
+    """
+    Regroupement hiérarchique des lignes de chaque matrice d'un tenseur (n, p, q)
+    
+    Les distances de toutes les matrices sont calculées en une passe
+    vectorisée, puis scipy construit chaque matrice de liaison. Les liaisons
+    sont mises en cache par empreinte de leur matrice (LRU, _LIAISONS_MAX
+    entrées) : un nouveau rendu (autre palette, autre moteur) ou un autre
+    fichier aux mêmes valeurs ne refait aucun regroupement.
+    
+    Paramètres:
+        tenseur (ndarray): Lot de matrices ; on regroupe l'axe 1
+        methode (str): Méthode de liaison (METHODES_CLUSTERING)
+        metrique (str): Distance entre lignes (METRIQUES_CLUSTERING)
+    
+    Retourne:
+        list: Matrice de liaison scipy de chaque matrice (None si moins de 2 lignes) ;
+              l'ordre des lignes est leaves_list(liaison)
+    """
+    if methode not in METHODES_CLUSTERING:
+        raise ValueError(f"Méthode de regroupement inconnue : '{methode}'. "
+                         f"Méthodes disponibles : {list(METHODES_CLUSTERING)}")
+    if metrique not in METRIQUES_CLUSTERING:
+        raise ValueError(f"Métrique inconnue : '{metrique}'. "
+                         f"Métriques disponibles : {list(METRIQUES_CLUSTERING)}")
+    if methode == 'ward' and metrique != 'euclidean':
+        raise ValueError("La méthode 'ward' exige la métrique 'euclidean'")
+    
+    tenseur = np.ascontiguousarray(tenseur, dtype=float)
+    if tenseur.shape[1] < 2:
+        return [None] * len(tenseur)
+    
+    reglages = repr((tenseur.shape[1:], methode, metrique)).encode()
+    cles = [hashlib.sha1(matrice.tobytes() + reglages).hexdigest() for matrice in tenseur]
+    with _LIAISONS_VERROU:
+        liaisons = [_LIAISONS.get(cle) for cle in cles]
+        for cle, liaison in zip(cles, liaisons):
+            if liaison is not None:
+                _LIAISONS.move_to_end(cle)
+    
+    a_calculer = [k for k, liaison in enumerate(liaisons) if liaison is None]
+    if a_calculer:
+        for k, distances in zip(a_calculer, _distances_lot(tenseur[a_calculer], metrique)):
+            liaisons[k] = linkage(distances, method=methode)
+            liaisons[k].setflags(write=False)
+        with _LIAISONS_VERROU:
+            for k in a_calculer:
+                _LIAISONS[cles[k]] = liaisons[k]
+            while len(_LIAISONS) > _LIAISONS_MAX:
+                _LIAISONS.popitem(last=False)
+    return liaisons
+
+
+def _formater_valeurs(matrice):
+    """
+    Textes d'annotation de toutes les cellules, en une passe vectorisée
+    
+    Nombre de décimales selon l'ordre de grandeur : 2 sous 1, 1 sous 10, 0 au-delà ;
+    texte vide pour les cellules manquantes (NaN).
+    """
+    matrice = np.asarray(matrice, dtype=float)
+    return np.where(np.isnan(matrice), '',
+                    np.where(matrice < 1, np.char.mod('%.2f', matrice),
+                             np.where(matrice < 10, np.char.mod('%.1f', matrice),
+                                      np.char.mod('%.0f', matrice))))
+
+
+# Au-delà de ce pas (une cellule annotée sur N), les annotations sont omises
+PAS_MAX_ANNOTATIONS = 3
+
+
+class AnnotationsCellules(Artist):
+    """
+    Valeurs de toutes les cellules d'une heatmap, dessinées par un seul artiste
+    
+    Remplace un objet Text par cellule : textes et couleurs (blanc sur les
+    cellules foncées) sont calculés en une passe par definir(), puis un Text
+    unique est repositionné et dessiné pour chaque cellule, avec un rendu
+    identique à ax.text.
+    
+    Niveau de détail : au moment du dessin, la taille des cellules en pixels
+    (dpi et taille de figure réels) est comparée à celle du texte le plus
+    long ; si les valeurs ne tiennent pas, une ligne / colonne sur N est
+    annotée, et au-delà de PAS_MAX_ANNOTATIONS aucune annotation n'est dessinée.
+    """
+    
+    def __init__(self, ax, fontsize=8):
+        super().__init__()
+        self.ax = ax
+        self.set_in_layout(False)
+        self._texte = Text(0, 0, '', ha="center", va="center", fontsize=fontsize)
+        self._texte.set_figure(ax.figure)
+        self._texte.set_transform(ax.transData)
+        self._texte.set_clip_path(ax.patch)
+        self.textes = None
+        self.blancs = None
+        ax.add_artist(self)
+    
+    def definir(self, matrice, matrice_plot, reference=None):
+        """
+        Fixe les valeurs affichées ; le texte est blanc au-delà de 60 % de
+        reference (défaut : maximum de matrice_plot)
+        """
+        if reference is None:
+            reference = np.nanmax(matrice_plot)
+        self.textes = _formater_valeurs(matrice)
+        self.blancs = np.asarray(matrice_plot) > reference * 0.6
+        self.stale = True
+    
+    def pas(self, renderer):
+        """
+        Pas d'annotation (lignes, colonnes) lisible à la taille de rendu, ou None
+        """
+        n_lignes, n_colonnes = self.textes.shape
+        cadre = self.ax.bbox
+        plus_long = max(self.textes.ravel(), key=len)
+        largeur, hauteur, _ = renderer.get_text_width_height_descent(
+            plus_long, self._texte.get_fontproperties(), ismath=False)
+        pas_lignes = max(1, int(np.ceil(1.2 * hauteur / (cadre.height / n_lignes))))
+        pas_colonnes = max(1, int(np.ceil(1.1 * largeur / (cadre.width / n_colonnes))))
+        if max(pas_lignes, pas_colonnes) > PAS_MAX_ANNOTATIONS:
+            return None
+        return pas_lignes, pas_colonnes
+    
+    def draw(self, renderer):
+        if not self.get_visible() or self.textes is None or self.textes.size == 0:
+            return
+        pas = self.pas(renderer)
+        if pas is None:
+            return
+        texte = self._texte
+        for i in range(0, self.textes.shape[0], pas[0]):
+            for j in range(0, self.textes.shape[1], pas[1]):
+                texte.set_text(self.textes[i, j])
+                texte.set_position((j, i))
+                texte.set_color('white' if self.blancs[i, j] else 'black')
+                texte.draw(renderer)
+        self.stale = False
+
+
+# Épaisseur des dendrogrammes, en fraction de la heatmap
+TAILLE_DENDROGRAMME = 0.15
+
+
+def _dessiner_dendrogramme(ax, liaison, orientation):
+    """
+    Trace un dendrogramme aligné sur les cellules d'une heatmap
+    
+    'top' : feuilles en bas, face aux colonnes (0 à n - 1) ; 'right' :
+    feuilles à gauche, face aux lignes (ligne 0 en haut, comme imshow).
+    """
+    arbre = dendrogram(liaison, no_plot=True)
+    n = len(arbre['leaves'])
+    segments = []
+    for xs, ys in zip(arbre['icoord'], arbre['dcoord']):
+        positions = (np.asarray(xs) - 5) / 10  # feuilles en 5, 15, 25... -> cellules 0, 1, 2...
+        segments.append(np.column_stack([positions, ys] if orientation == 'top' else [ys, positions]))
+    ax.add_collection(LineCollection(segments, colors='black', linewidths=0.6))
+    hauteur = max((max(ys) for ys in arbre['dcoord']), default=0) or 1
+    if orientation == 'top':
+        ax.set_xlim(-0.5, n - 0.5)
+        ax.set_ylim(0, hauteur * 1.05)
+    else:
+        ax.set_ylim(n - 0.5, -0.5)
+        ax.set_xlim(0, hauteur * 1.05)
+    ax.set_axis_off()
+
+
+def _ajouter_dendrogrammes(ax, dendrogrammes):
+    """
+    Ajoute autour d'une heatmap les dendrogrammes (liaison des lignes, des colonnes)
+    
+    Celui des lignes est à droite, celui des colonnes au-dessus (axes
+    incrustés, pris en compte par les mises en page tight et constrained).
+    
+    Retourne:
+        tuple: (axe qui doit porter le titre, marge à ajouter avant la colorbar)
+    """
+    liaison_lignes, liaison_colonnes = dendrogrammes
+    porteur_titre, marge = ax, 0
+    if liaison_lignes is not None:
+        _dessiner_dendrogramme(ax.inset_axes([1.01, 0, TAILLE_DENDROGRAMME, 1]),
+                               liaison_lignes, 'right')
+        marge = TAILLE_DENDROGRAMME + 0.01
+    if liaison_colonnes is not None:
+        porteur_titre = ax.inset_axes([0, 1.01, 1, TAILLE_DENDROGRAMME])
+        _dessiner_dendrogramme(porteur_titre, liaison_colonnes, 'top')
+    return porteur_titre, marge
+
+
+def dessiner_heatmap(matrice, titre, valeurs_x, groupes, label_x, config,
+                     afficher_valeurs=True, palette='rouge', matrice_plot=None,
+                     dendrogrammes=None):
+    """
+    Dessine une heatmap avec matplotlib et retourne l'image PNG (bytes)
+    
+    Fonction indépendante de HeatmapGenerator pour pouvoir être exécutée
+    dans un processus de rendu séparé.
+    
+    Paramètres:
+        matrice (ndarray): Matrice [valeurs_x × groupes]
+        titre (str): Titre de la heatmap (nom du marqueur)
+        valeurs_x, groupes (list): Labels des lignes et des colonnes
+        label_x (str): Label de l'axe X
+        config (dict): Configuration du générateur (echelle_log, taille_heatmap, dpi)
+        matrice_plot (ndarray): Valeurs déjà transformées pour les couleurs
+                                (None = transformer_valeurs(matrice, config))
+        dendrogrammes (tuple): (liaison des lignes, liaison des colonnes), l'une
+                               pouvant être None ; matrice et labels sont déjà
+                               dans l'ordre des feuilles (None = pas de dendrogramme)
+    """
+    # Appliquer échelle logarithmique si demandé
+    if matrice_plot is None:
+        matrice_plot = transformer_valeurs(matrice, config)
+    
+    cmap = obtenir_colormap(palette)
+    
+    # Créer figure
+    fig, ax = plt.subplots(figsize=config['taille_heatmap'], dpi=config['dpi'])
+    
+    # Créer heatmap
+    im = ax.imshow(matrice_plot, cmap=cmap, aspect='auto')
+    
+    # Configurer axes
+    ax.set_xticks(np.arange(len(groupes)))
+    ax.set_yticks(np.arange(len(valeurs_x)))
+    ax.set_xticklabels(groupes, fontsize=9)
+    ax.set_yticklabels(valeurs_x, fontsize=9)
+    
+    # Labels des axes
+    ax.set_xlabel(label_x, fontsize=10, fontweight='bold')
+    
+    # Rotation des labels X si nécessaire
+    plt.setp(ax.get_xticklabels(), rotation=45, ha="right", rotation_mode="anchor")
+    
+    # Afficher valeurs si demandé (format et couleur calculés en une passe)
+    if afficher_valeurs:
+        AnnotationsCellules(ax).definir(matrice, matrice_plot)
+    
+    # Dendrogrammes du regroupement hiérarchique (le titre passe au-dessus)
+    porteur_titre, marge = ax, 0
+    if dendrogrammes is not None:
+        porteur_titre, marge = _ajouter_dendrogrammes(ax, dendrogrammes)
+    
+    # Titre
+    porteur_titre.set_title(titre, fontsize=12, fontweight='bold', pad=10)
+    
+    # Colorbar
+    cbar = plt.colorbar(im, ax=ax, fraction=0.046, pad=0.04 + marge)
+    cbar.set_label(libelle_echelle(config), rotation=270, labelpad=15, fontsize=8)
+    
+    plt.tight_layout()
+    
+    # Sauvegarder en mémoire
+    buffer = BytesIO()
+    plt.savefig(buffer, format='png', bbox_inches='tight', dpi=config['dpi'])
+    plt.close()
+    
+    return buffer.getvalue()
+
+
+class _GabaritHeatmap:
+    """
+    Figure matplotlib préparée une fois pour une forme et une configuration
+    
+    Axes, ticks, colorbar, annotations et mise en page sont créés
+    à la construction ; rendre() ne remplace que l'image, les limites de
+    couleur, le titre et le texte des annotations avant l'encodage PNG.
+    
+    Le cadrage 'tight' (qui coûte un rendu complet supplémentaire) est
+    calculé au premier rendu puis réutilisé, avec une marge à droite pour
+    les graduations de la colorbar ; il n'est recalculé que si un titre
+    dépasse du cadre.
+    """
+    
+    MARGE_COLORBAR = 0.15  # pouces
+    
+    def __init__(self, forme, valeurs_x, groupes, label_x, config, afficher_valeurs, palette):
+        self.config = config
+        self.fig = Figure(figsize=config['taille_heatmap'], dpi=config['dpi'])
+        FigureCanvasAgg(self.fig)
+        ax = self.fig.subplots()
+        
+        self.im = ax.imshow(np.zeros(forme), cmap=obtenir_colormap(palette), aspect='auto')
+        
+        ax.set_xticks(np.arange(len(groupes)))
+        ax.set_yticks(np.arange(len(valeurs_x)))
+        ax.set_xticklabels(groupes, fontsize=9)
+        ax.set_yticklabels(valeurs_x, fontsize=9)
+        ax.set_xlabel(label_x, fontsize=10, fontweight='bold')
+        for label in ax.get_xticklabels():
+            label.set(rotation=45, ha="right", rotation_mode="anchor")
+        
+        self.annotations = AnnotationsCellules(ax) if afficher_valeurs else None
+        
+        self.titre = ax.set_title('Marqueur', fontsize=12, fontweight='bold', pad=10)
+        
+        cbar = self.fig.colorbar(self.im, ax=ax, fraction=0.046, pad=0.04)
+        cbar.set_label(libelle_echelle(config), rotation=270, labelpad=15, fontsize=8)
+        
+        # Mise en page calculée une fois, sans moteur attaché à la figure :
+        # savefig n'a alors plus de rendu préalable à faire à chaque image
+        TightLayoutEngine().execute(self.fig)
+        self.cadre = None
+    
+    def _cadrer(self):
+        renderer = self.fig.canvas.get_renderer()
+        if self.cadre is not None:
+            titre = self.titre.get_window_extent(renderer).transformed(self.fig.dpi_scale_trans.inverted())
+            if titre.x0 >= self.cadre.x0 and titre.x1 <= self.cadre.x1:
+                return self.cadre
+        self.fig.canvas.draw()
+        cadre = self.fig.get_tightbbox(renderer)
+        pad = plt.rcParams['savefig.pad_inches']
+        self.cadre = Bbox.from_extents(cadre.x0 - pad, cadre.y0 - pad,
+                                       cadre.x1 + pad + self.MARGE_COLORBAR, cadre.y1 + pad)
+        return self.cadre
+    
+    def rendre(self, matrice, titre, matrice_plot=None):
+        if matrice_plot is None:
+            matrice_plot = transformer_valeurs(matrice, self.config)
+        
+        self.im.set_data(matrice_plot)
+        self.im.set_clim(np.nanmin(matrice_plot), np.nanmax(matrice_plot))
+        self.titre.set_text(titre)
+        
+        if self.annotations is not None:
+            self.annotations.definir(matrice, matrice_plot)
+        
+        buffer = BytesIO()
+        self.fig.savefig(buffer, format='png', bbox_inches=self._cadrer(), dpi=self.config['dpi'])
+        return buffer.getvalue()
+
+
+_GABARITS = OrderedDict()
+_GABARITS_MAX = 8
+_GABARITS_VERROU = threading.Lock()
+
+
+def dessiner_heatmap_reutilisee(matrice, titre, valeurs_x, groupes, label_x, config,
+                                afficher_valeurs=True, palette='rouge', matrice_plot=None,
+                                dendrogrammes=None):
+    """
+    Variante de dessiner_heatmap qui réutilise une figure par forme et configuration
+    
+    Les gabarits sont conservés (LRU, _GABARITS_MAX entrées) au niveau du
+    module, donc partagés par tous les marqueurs d'un même processus. Les
+    heatmaps avec dendrogrammes (propres à chaque marqueur) sont déléguées
+    à dessiner_heatmap.
+    """
+    if dendrogrammes is not None:
+        return dessiner_heatmap(matrice, titre, valeurs_x, groupes, label_x, config,
+                                afficher_valeurs, palette, matrice_plot, dendrogrammes)
+    
+    cle = (matrice.shape, tuple(valeurs_x), tuple(groupes), label_x, palette, afficher_valeurs,
+           libelle_echelle(config), tuple(config['taille_heatmap']), config['dpi'])
+    
+    with _GABARITS_VERROU:
+        gabarit = _GABARITS.get(cle)
+        if gabarit is None:
+            gabarit = _GabaritHeatmap(matrice.shape, valeurs_x, groupes, label_x, config,
+                                      afficher_valeurs, palette)
+            _GABARITS[cle] = gabarit
+            if len(_GABARITS) > _GABARITS_MAX:
+                _GABARITS.popitem(last=False)
+        else:
+            _GABARITS.move_to_end(cle)
+        
+        return gabarit.rendre(matrice, titre, matrice_plot)
+
+
+def _encoder_png(image, dpi):
+    """
+    Encode directement une image RGB uint8 (hauteur × largeur × 3) en PNG
+    """
+    hauteur, largeur = image.shape[:2]
+    lignes = np.zeros((hauteur, largeur * 3 + 1), dtype=np.uint8)  # octet 0 = filtre 'None'
+    lignes[:, 1:] = image.reshape(hauteur, -1)
+    
+    def bloc(type_bloc, donnees):
+        return (struct.pack('>I', len(donnees)) + type_bloc + donnees
+                + struct.pack('>I', zlib.crc32(type_bloc + donnees) & 0xFFFFFFFF))
+    
+    pixels_par_metre = int(round(dpi / 0.0254))
+    return (b'\x89PNG\r\n\x1a\n'
+            + bloc(b'IHDR', struct.pack('>IIBBBBB', largeur, hauteur, 8, 2, 0, 0, 0))
+            + bloc(b'pHYs', struct.pack('>IIB', pixels_par_metre, pixels_par_metre, 1))
+            + bloc(b'IDAT', zlib.compress(lignes.tobytes(), 6))
+            + bloc(b'IEND', b''))
+
+
+_POLICE_VERROU = threading.Lock()
+
+
+@lru_cache(maxsize=4096)
+def _texte_bitmap(texte, taille, dpi, gras=False):
+    """
+    Rasterise un texte en masque alpha (0-1), mis en cache par texte et taille
+    """
+    chemin = findfont(FontProperties(family='sans-serif', weight='bold' if gras else 'normal'))
+    with _POLICE_VERROU:
+        police = get_font(chemin)
+        police.clear()
+        police.set_size(taille, dpi)
+        police.set_text(str(texte), 0.0)
+        police.draw_glyphs_to_bitmap(antialiased=True)
+        masque = np.asarray(police.get_image(), dtype=np.float32) / 255.0
+    masque.setflags(write=False)
+    return masque
+
+
+def _coller_texte(image, masque, x, y, ha='left', va='top'):
+    """
+    Dessine un masque de texte en noir sur l'image, ancré en (x, y)
+    """
+    h, w = masque.shape
+    x -= {'left': 0, 'center': w // 2, 'right': w}[ha]
+    y -= {'top': 0, 'center': h // 2, 'bottom': h}[va]
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + w, image.shape[1]), min(y + h, image.shape[0])
+    if x0 >= x1 or y0 >= y1:
+        return
+    alpha = masque[y0 - y:y1 - y, x0 - x:x1 - x, None]
+    zone = image[y0:y1, x0:x1]
+    zone[:] = zone * (1 - alpha)
+
+
+def _indices_lut(matrice_plot):
+    """
+    Indices dans la table de correspondance (0-255) des valeurs d'une matrice
+    
+    Normalisation min-max comme imshow ; les NaN reçoivent l'indice 0.
+    
+    Retourne:
+        tuple: (indices, vmin, vmax)
+    """
+    vmin, vmax = np.nanmin(matrice_plot), np.nanmax(matrice_plot)
+    if vmax > vmin:
+        normee = (matrice_plot - vmin) / (vmax - vmin)
+    else:
+        normee = np.zeros_like(matrice_plot)
+    return np.clip(np.nan_to_num(normee * 256), 0, 255).astype(np.intp), vmin, vmax
+
+
+class _CalqueRaster:
+    """
+    Partie fixe d'une heatmap raster : labels des axes, cadre et colorbar
+    
+    Construit une fois par forme et configuration ; par marqueur, seuls la
+    grille colorée, le titre et les bornes de la colorbar sont ajoutés.
+    """
+    
+    def __init__(self, forme, valeurs_x, groupes, label_x, palette, libelle, taille, dpi):
+        n_x, n_g = forme
+        pt = dpi / 72  # pixels par point typographique
+        marge = max(int(4 * pt), 2)
+        
+        labels_x = [_texte_bitmap(v, 9, dpi) for v in valeurs_x]
+        labels_groupes = [np.rot90(_texte_bitmap(g, 9, dpi)) for g in groupes]
+        label_axe = _texte_bitmap(label_x, 10, dpi, gras=True)
+        label_cbar = np.rot90(_texte_bitmap(libelle, 8, dpi), 3)
+        
+        self.dpi = dpi
+        self.marge = marge
+        self.largeur_chiffres = _texte_bitmap('0.000', 8, dpi).shape[1]
+        haut = _texte_bitmap('Mg', 12, dpi, gras=True).shape[0] + 3 * marge
+        gauche = 2 * marge + max((m.shape[1] for m in labels_x), default=0)
+        bas = (3 * marge + max((m.shape[0] for m in labels_groupes), default=0)
+               + label_axe.shape[0] + marge)
+        largeur_cbar = max(int(10 * pt), 4)
+        droite = 5 * marge + largeur_cbar + self.largeur_chiffres + label_cbar.shape[1]
+        
+        # Cellules de taille entière : la grille est agrandie par répétition
+        largeur, hauteur = (int(round(t * dpi)) for t in taille)
+        self.cellule = (max((hauteur - haut - bas) // max(n_x, 1), 1),
+                        max((largeur - gauche - droite) // max(n_g, 1), 1))
+        grille_h, grille_l = self.cellule[0] * n_x, self.cellule[1] * n_g
+        self.origine = (haut, gauche)
+        
+        image = np.full((haut + grille_h + bas, gauche + grille_l + droite, 3), 255, dtype=np.uint8)
+        image[haut - 1:haut + grille_h + 1, gauche - 1:gauche + grille_l + 1] = 0  # cadre
+        
+        for i, masque in enumerate(labels_x):
+            _coller_texte(image, masque, gauche - marge, haut + (2 * i + 1) * self.cellule[0] // 2,
+                          ha='right', va='center')
+        for j, masque in enumerate(labels_groupes):
+            _coller_texte(image, masque, gauche + (2 * j + 1) * self.cellule[1] // 2,
+                          haut + grille_h + marge, ha='center')
+        _coller_texte(image, label_axe, gauche + grille_l // 2, image.shape[0] - marge,
+                      ha='center', va='bottom')
+        
+        # Colorbar : dégradé de la palette, maximum en haut
+        x_cbar = gauche + grille_l + 2 * marge
+        lut = obtenir_lut(palette)[:, :3]
+        image[haut - 1:haut + grille_h + 1, x_cbar - 1:x_cbar + largeur_cbar + 1] = 0
+        image[haut:haut + grille_h, x_cbar:x_cbar + largeur_cbar] = \
+            lut[np.linspace(255, 0, grille_h).round().astype(int)][:, None, :]
+        _coller_texte(image, label_cbar, image.shape[1] - marge, haut + grille_h // 2,
+                      ha='right', va='center')
+        
+        self.x_chiffres = x_cbar + largeur_cbar + marge
+        self.lut = lut
+        self.image = image
+        self.image.setflags(write=False)
+    
+    def rendre(self, matrice_plot, titre):
+        image = self.image.copy()
+        haut, gauche = self.origine
+        
+        index, vmin, vmax = _indices_lut(matrice_plot)
+        couleurs = self.lut[index]
+        couleurs[np.isnan(matrice_plot)] = 255
+        grille = np.repeat(np.repeat(couleurs, self.cellule[0], axis=0), self.cellule[1], axis=1)
+        image[haut:haut + grille.shape[0], gauche:gauche + grille.shape[1]] = grille
+        
+        _coller_texte(image, _texte_bitmap(titre, 12, self.dpi, gras=True),
+                      gauche + grille.shape[1] // 2, self.marge, ha='center')
+        _coller_texte(image, _texte_bitmap(f'{vmax:.3g}', 8, self.dpi), self.x_chiffres, haut)
+        _coller_texte(image, _texte_bitmap(f'{vmin:.3g}', 8, self.dpi), self.x_chiffres,
+                      haut + grille.shape[0], va='bottom')
+        
+        return _encoder_png(image, self.dpi)
+
+
+@lru_cache(maxsize=8)
+def _calque_raster(forme, valeurs_x, groupes, label_x, palette, libelle, taille, dpi):
+    return _CalqueRaster(forme, valeurs_x, groupes, label_x, palette, libelle, taille, dpi)
+
+
+def dessiner_heatmap_raster(matrice, titre, valeurs_x, groupes, label_x, config,
+                            afficher_valeurs=True, palette='rouge', matrice_plot=None,
+                            dendrogrammes=None):
+    """
+    Rendu direct en NumPy, sans figure matplotlib, des heatmaps sans annotations
+    
+    La palette est appliquée par table de correspondance, les cellules sont
+    agrandies par répétition entière et le PNG est encodé directement ; les
+    labels et la colorbar proviennent d'un calque mis en cache. Les heatmaps
+    avec valeurs affichées ou dendrogrammes sont déléguées au moteur 'reutilisation'.
+    """
+    if afficher_valeurs or dendrogrammes is not None:
+        return dessiner_heatmap_reutilisee(matrice, titre, valeurs_x, groupes, label_x, config,
+                                           afficher_valeurs, palette, matrice_plot, dendrogrammes)
+    
+    if matrice_plot is None:
+        matrice_plot = transformer_valeurs(matrice, config)
+    
+    calque = _calque_raster(matrice.shape, tuple(valeurs_x), tuple(groupes), label_x, palette,
+                            libelle_echelle(config), tuple(config['taille_heatmap']), config['dpi'])
+    return calque.rendre(matrice_plot, titre)
+
+
+MOTEURS_RENDU = {
+    'matplotlib': dessiner_heatmap,
+    'reutilisation': dessiner_heatmap_reutilisee,
+    'raster': dessiner_heatmap_raster,
+}
+
+
+def rendre_heatmap(matrice, titre, valeurs_x, groupes, label_x, config,
+                   afficher_valeurs=True, palette='rouge', matrice_plot=None, dendrogrammes=None):
+    """
+    Rend une heatmap en PNG avec le moteur choisi par config['moteur_rendu']
+    """
+    moteur = config.get('moteur_rendu', 'matplotlib')
+    if moteur not in MOTEURS_RENDU:
+        raise ValueError(f"Moteur de rendu inconnu : '{moteur}'. "
+                         f"Moteurs disponibles : {list(MOTEURS_RENDU)}")
+    return MOTEURS_RENDU[moteur](matrice, titre, valeurs_x, groupes, label_x, config,
+                                 afficher_valeurs, palette, matrice_plot, dendrogrammes)
+
+
+def _rendre_heatmap_tache(tache):
+    # Point d'entrée picklable pour ProcessPoolExecutor
+    return rendre_heatmap(*tache)
+
+
+def _executer_lot(executer, lot):
+    # Point d'entrée picklable : rend un lot de tâches dans un processus du pool
+    return [executer(tache) for tache in lot]
+
+
+def dessiner_planche(matrices, titres, valeurs_x, groupes, label_x, config, afficher_valeurs=True,
+                     palette='rouge', matrices_plot=None, disposition=(3, 2), echelle_commune=False,
+                     etiquettes=None, dendrogrammes=None):
+    """
+    Dessine toutes les heatmaps d'un slide dans une seule figure et retourne le PNG (bytes)
+    
+    Une figure, une mise en page et un encodage PNG par slide au lieu d'un
+    par marqueur. La figure couvre la zone des heatmaps du slide (9 × 6
+    pouces, agrandie pour que chaque panneau garde environ la taille
+    config['taille_heatmap']).
+    
+    Paramètres:
+        matrices, titres (list): Matrices et titres des panneaux, dans l'ordre
+        matrices_plot (list): Valeurs transformées (None = transformer_valeurs)
+        disposition (tuple): (colonnes, lignes) de la grille du slide
+        echelle_commune (bool): Même échelle de couleurs pour tous les panneaux,
+                                avec une seule colorbar
+        etiquettes (list): (valeurs_x, groupes) propres à chaque panneau, quand
+                           le regroupement hiérarchique les réordonne
+                           (None = valeurs_x et groupes pour tous)
+        dendrogrammes (list): Dendrogrammes de chaque panneau (voir dessiner_heatmap)
+        Autres paramètres : comme dessiner_heatmap
+    """
+    cols, rows = disposition
+    if matrices_plot is None:
+        matrices_plot = [None] * len(matrices)
+    if etiquettes is None:
+        etiquettes = [(valeurs_x, groupes)] * len(matrices)
+    if dendrogrammes is None:
+        dendrogrammes = [None] * len(matrices)
+    matrices_plot = [transformer_valeurs(m, config) if mp is None else mp
+                     for m, mp in zip(matrices, matrices_plot)]
+    
+    largeur, hauteur = config['taille_heatmap']
+    agrandissement = max(cols * largeur / 9, rows * hauteur / 6)
+    fig = Figure(figsize=(9 * agrandissement, 6 * agrandissement), dpi=config['dpi'],
+                 layout='constrained')
+    FigureCanvasAgg(fig)
+    axes = fig.subplots(rows, cols, squeeze=False).ravel()
+    
+    cmap = obtenir_colormap(palette)
+    vmin = vmax = None
+    if echelle_commune:
+        vmin = min(np.nanmin(mp) for mp in matrices_plot)
+        vmax = max(np.nanmax(mp) for mp in matrices_plot)
+    libelle = libelle_echelle(config)
+    
+    panneaux = zip(axes, matrices, matrices_plot, titres, etiquettes, dendrogrammes)
+    for ax, matrice, matrice_plot, titre, (valeurs_x, groupes), dendros in panneaux:
+        im = ax.imshow(matrice_plot, cmap=cmap, aspect='auto', vmin=vmin, vmax=vmax)
+        ax.set_xticks(np.arange(len(groupes)))
+        ax.set_yticks(np.arange(len(valeurs_x)))
+        ax.set_xticklabels(groupes, fontsize=9, rotation=45, ha="right", rotation_mode="anchor")
+        ax.set_yticklabels(valeurs_x, fontsize=9)
+        ax.set_xlabel(label_x, fontsize=10, fontweight='bold')
+        porteur_titre, marge = ax, 0
+        if dendros is not None:
+            porteur_titre, marge = _ajouter_dendrogrammes(ax, dendros)
+        porteur_titre.set_title(titre, fontsize=12, fontweight='bold', pad=10)
+        
+        if afficher_valeurs:
+            # Seuil de contraste relatif à l'échelle du panneau (ou à l'échelle commune)
+            AnnotationsCellules(ax).definir(matrice, matrice_plot, vmax)
+        
+        if not echelle_commune:
+            cbar = fig.colorbar(im, ax=ax, fraction=0.046, pad=0.04 + marge)
+            cbar.set_label(libelle, rotation=270, labelpad=15, fontsize=8)
+    
+    # Emplacements vides du dernier slide
+    for ax in axes[len(matrices):]:
+        fig.delaxes(ax)
+    
+    if echelle_commune:
+        cbar = fig.colorbar(im, ax=list(axes[:len(matrices)]), fraction=0.046 / cols, pad=0.02)
+        cbar.set_label(libelle, rotation=270, labelpad=15, fontsize=8)
+    
+    buffer = BytesIO()
+    fig.savefig(buffer, format='png', dpi=config['dpi'])
+    return buffer.getvalue()
+
+
+def _rendre_planche_tache(tache):
+    # Point d'entrée picklable pour ProcessPoolExecutor.map
+    return dessiner_planche(*tache)
+
+
+# Au-delà, les noms des marqueurs ne sont pas écrits sous leur dendrogramme
+MAX_NOMS_DENDROGRAMME = 150
+
+
+def dessiner_dendrogramme_marqueurs(liaison, marqueurs, config):
+    """
+    Dessine le dendrogramme du regroupement des marqueurs et retourne le PNG (bytes)
+    
+    Paramètres:
+        liaison (ndarray): Matrice de liaison des marqueurs (calculer_liaisons)
+        marqueurs (list): Noms des marqueurs, dans l'ordre des lignes regroupées
+        config (dict): Configuration du générateur (dpi)
+    """
+    fig = Figure(figsize=(9, 6), dpi=config['dpi'], layout='constrained')
+    FigureCanvasAgg(fig)
+    ax = fig.subplots()
+    _dessiner_dendrogramme(ax, liaison, 'top')
+    
+    n = len(marqueurs)
+    if n <= MAX_NOMS_DENDROGRAMME:
+        ax.set_axis_on()
+        for bord in ax.spines.values():
+            bord.set_visible(False)
+        ax.set_yticks([])
+        ax.set_xticks(np.arange(n))
+        ax.set_xticklabels([marqueurs[k] for k in leaves_list(liaison)], rotation=90,
+                           fontsize=max(4, min(9, 400 / n)))
+        ax.tick_params(axis='x', length=0)
+    ax.set_title('Regroupement hiérarchique des marqueurs', fontsize=12, fontweight='bold')
+    
+    buffer = BytesIO()
+    fig.savefig(buffer, format='png', dpi=config['dpi'])
+    return buffer.getvalue()
+
+
+# Nombre de pas de la légende des heatmaps natives
+PAS_LEGENDE_PPTX = 12
+
+
+def _zone_texte(slide, gauche, haut, largeur, hauteur, texte, taille, gras=False,
+                alignement=PP_ALIGN.CENTER):
+    # Zone de texte sans marges, centrée verticalement
+    zone = slide.shapes.add_textbox(Emu(int(gauche)), Emu(int(haut)),
+                                    Emu(int(largeur)), Emu(int(hauteur)))
+    cadre = zone.text_frame
+    cadre.margin_left = cadre.margin_right = cadre.margin_top = cadre.margin_bottom = 0
+    cadre.vertical_anchor = MSO_ANCHOR.MIDDLE
+    cadre.word_wrap = False
+    paragraphe = cadre.paragraphs[0]
+    paragraphe.text = texte
+    paragraphe.alignment = alignement
+    paragraphe.font.size = Pt(taille)
+    paragraphe.font.bold = gras
+    return zone
+
+
+def dessiner_heatmap_pptx(slide, gauche, haut, largeur, hauteur, matrice, titre, valeurs_x,
+                          groupes, label_x, config, afficher_valeurs=True, palette='rouge',
+                          matrice_plot=None):
+    """
+    Dessine une heatmap en formes PowerPoint natives (aucune image)
+    
+    Un tableau porte les labels et les cellules, remplies depuis la table de
+    correspondance de la palette, avec les valeurs en texte ; une légende en
+    dégradé (pavés de couleur) indique le minimum et le maximum. Le résultat
+    reste modifiable et net à tout niveau de zoom.
+    
+    Paramètres:
+        slide: Slide python-pptx
+        gauche, haut, largeur, hauteur: Emplacement (EMU, ex. Inches(1))
+        Autres paramètres : comme dessiner_heatmap
+    """
+    if matrice_plot is None:
+        matrice_plot = transformer_valeurs(matrice, config)
+    n_lignes, n_colonnes = matrice.shape
+    lut = obtenir_lut(palette)
+    index, vmin, vmax = _indices_lut(matrice_plot)
+    manquantes = np.isnan(matrice_plot)
+    seuil = np.nanmax(matrice_plot) * 0.6
+    textes = _formater_valeurs(matrice)
+    
+    # Titre, tableau (~85 % de la largeur) et légende à droite
+    h_titre = hauteur * 0.12
+    l_legende = largeur * 0.15
+    l_tableau = largeur - l_legende
+    h_tableau = hauteur - h_titre
+    _zone_texte(slide, gauche, haut, l_tableau, h_titre, titre, 11, gras=True)
+    
+    h_ligne = h_tableau / (n_lignes + 1)
+    taille_police = max(4, min(8, Emu(int(h_ligne)).pt * 0.5))
+    forme = slide.shapes.add_table(n_lignes + 1, n_colonnes + 1, Emu(int(gauche)),
+                                   Emu(int(haut + h_titre)), Emu(int(l_tableau)), Emu(int(h_tableau)))
+    tableau = forme.table
+    tableau.first_row = tableau.horz_banding = False
+    for ligne in tableau.rows:
+        ligne.height = Emu(int(h_ligne))
+    
+    def remplir(cellule, texte, fond, couleur_texte=RGBColor(0, 0, 0), gras=False):
+        cellule.fill.solid()
+        cellule.fill.fore_color.rgb = fond
+        cellule.margin_left = cellule.margin_right = Pt(1)
+        cellule.margin_top = cellule.margin_bottom = 0
+        cellule.vertical_anchor = MSO_ANCHOR.MIDDLE
+        paragraphe = cellule.text_frame.paragraphs[0]
+        paragraphe.text = texte
+        paragraphe.alignment = PP_ALIGN.CENTER
+        paragraphe.font.size = Pt(taille_police)
+        paragraphe.font.bold = gras
+        paragraphe.font.color.rgb = couleur_texte
+    
+    blanc, noir = RGBColor(255, 255, 255), RGBColor(0, 0, 0)
+    remplir(tableau.cell(0, 0), str(label_x), blanc, gras=True)
+    for j, groupe in enumerate(groupes):
+        remplir(tableau.cell(0, j + 1), str(groupe), blanc, gras=True)
+    for i, val_x in enumerate(valeurs_x):
+        remplir(tableau.cell(i + 1, 0), str(val_x), blanc, gras=True)
+        for j in range(n_colonnes):
+            if manquantes[i, j]:
+                remplir(tableau.cell(i + 1, j + 1), '', blanc)
+                continue
+            fond = RGBColor(*(int(c) for c in lut[index[i, j], :3]))
+            texte = textes[i, j] if afficher_valeurs else ''
+            remplir(tableau.cell(i + 1, j + 1), texte, fond,
+                    blanc if matrice_plot[i, j] > seuil else noir)
+    
+    # Légende : pavés du maximum (haut) au minimum (bas), bornes en texte
+    l_pave = l_legende * 0.25
+    x_pave = gauche + l_tableau + l_legende * 0.1
+    y_legende = haut + h_titre + h_ligne
+    h_pave = (h_tableau - h_ligne) / PAS_LEGENDE_PPTX
+    for k in range(PAS_LEGENDE_PPTX):
+        couleur = lut[int(round(255 * (1 - k / (PAS_LEGENDE_PPTX - 1))))]
+        pave = slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, Emu(int(x_pave)),
+                                      Emu(int(y_legende + k * h_pave)),
+                                      Emu(int(l_pave)), Emu(int(h_pave) + 1))
+        pave.fill.solid()
+        pave.fill.fore_color.rgb = RGBColor(*(int(c) for c in couleur[:3]))
+        pave.line.fill.background()
+        pave.shadow.inherit = False
+    x_bornes = x_pave + l_pave + l_legende * 0.05
+    l_bornes = l_legende - (x_bornes - gauche - l_tableau)
+    _zone_texte(slide, x_bornes, y_legende, l_bornes, h_pave, f'{vmax:.3g}', 6,
+                alignement=PP_ALIGN.LEFT)
+    _zone_texte(slide, x_bornes, y_legende + h_tableau - h_ligne - h_pave, l_bornes, h_pave,
+                f'{vmin:.3g}', 6, alignement=PP_ALIGN.LEFT)
+    legende = libelle_echelle(config)
+    _zone_texte(slide, x_bornes, y_legende + (h_tableau - h_ligne - h_pave) / 2, l_bornes, h_pave,
+                legende, 5, alignement=PP_ALIGN.LEFT)
+
+
+FORMATS_EXTENSIONS = {
+    '.xlsx': 'excel', '.xls': 'excel',
+    '.csv': 'csv',
+    '.parquet': 'parquet', '.pq': 'parquet',
+    '.feather': 'feather',
+    '.arrow': 'arrow', '.arrows': 'arrow', '.ipc': 'arrow',
+}
+
+
+def detecter_format(source):
+    """
+    Détecte le format d'une source de données :
+    'excel', 'csv', 'parquet', 'feather' ou 'arrow'
+    
+    Utilise l'extension (chemin, ou attribut name d'un fichier uploadé),
+    sinon la signature des premiers octets d'un contenu en mémoire.
+    """
+    nom = source if isinstance(source, (str, os.PathLike)) else getattr(source, 'name', None)
+    if nom is not None:
+        extension = os.path.splitext(os.fspath(nom).lower())[1]
+        if extension in FORMATS_EXTENSIONS:
+            return FORMATS_EXTENSIONS[extension]
+        if isinstance(source, (str, os.PathLike)):
+            raise ValueError(f"Format de fichier non supporté. Utilisez "
+                             f"{', '.join(FORMATS_EXTENSIONS)}")
+    
+    if isinstance(source, (bytes, bytearray)):
+        entete = bytes(source[:6])
+    else:
+        position = source.tell()
+        entete = source.read(6)
+        source.seek(position)
+    # Signatures ZIP (.xlsx), OLE2 (.xls), Parquet, Feather v1, Arrow IPC (fichier et flux)
+    if entete[:4] in (b'PK\x03\x04', b'\xd0\xcf\x11\xe0'):
+        return 'excel'
+    if entete[:4] == b'PAR1':
+        return 'parquet'
+    if entete[:4] == b'FEA1':
+        return 'feather'
+    if entete == b'ARROW1' or entete[:4] == b'\xff\xff\xff\xff':
+        return 'arrow'
+    return 'csv'
+
+
+def _colonnes_utiles(noms, colonne_x):
+    """
+    Colonnes à lire d'un format colonnaire : la colonne X et les colonnes
+    au format Marqueur_Groupe_Réplicat (les autres sont ignorées)
+    """
+    if colonne_x is None:
+        colonne_x = noms[0]
+    schema = analyser_colonnes(noms, colonne_x)
+    return [col for col, m in zip(schema.colonnes, schema.marqueur)
+            if col == colonne_x or m is not None]
+
+
+def _lire_colonnaire(source, format_source, colonne_x=None, afficher=print):
+    """
+    Lit une source Parquet, Feather ou Arrow IPC en ne chargeant que les colonnes utiles
+    
+    Les chemins sont lus en mémoire mappée : seules les colonnes retenues
+    sont effectivement parcourues.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        import pyarrow.feather as feather
+    except ImportError:
+        raise ImportError("Le module pyarrow est requis pour lire les fichiers Parquet, "
+                          "Feather et Arrow : pip install pyarrow")
+    
+    est_chemin = isinstance(source, (str, os.PathLike))
+    if isinstance(source, (bytes, bytearray)):
+        source = pa.BufferReader(source)
+    
+    if format_source == 'parquet':
+        afficher(f"Type de fichier détecté : Parquet")
+        fichier = pq.ParquetFile(source, memory_map=est_chemin)
+        colonnes = _colonnes_utiles(fichier.schema_arrow.names, colonne_x)
+        table = fichier.read(columns=colonnes)
+    else:
+        afficher(f"Type de fichier détecté : {'Feather' if format_source == 'feather' else 'Arrow IPC'}")
+        flux = pa.memory_map(os.fspath(source)) if est_chemin else source
+        try:
+            lecteur = pa.ipc.open_file(flux)
+        except pa.ArrowInvalid:
+            flux.seek(0)
+            if format_source == 'feather':
+                # Feather v1 (antérieur à Arrow IPC) : pas de lecture partielle du schéma
+                table = feather.read_table(flux)
+                return table.select(_colonnes_utiles(table.schema.names, colonne_x)).to_pandas()
+            lecteur = pa.ipc.open_stream(flux)
+        colonnes = _colonnes_utiles(lecteur.schema.names, colonne_x)
+        if isinstance(lecteur, pa.ipc.RecordBatchFileReader):
+            lots = (lecteur.get_batch(i) for i in range(lecteur.num_record_batches))
+        else:
+            lots = lecteur
+        # Sélection lot par lot : les colonnes écartées ne sont jamais rassemblées en table
+        schema = pa.schema([lecteur.schema.field(nom) for nom in colonnes])
+        table = pa.Table.from_batches((lot.select(colonnes) for lot in lots), schema=schema)
+    
+    return table.to_pandas()
+
+
+def lire_tableau(source, format_source=None, colonne_x=None, afficher=print):
+    """
+    Lit une source de données (chemin, bytes ou objet fichier) en DataFrame
+    
+    Pour Excel, la feuille "Données" est utilisée si elle existe, sinon la
+    première feuille. Pour Parquet, Feather et Arrow IPC, seules la colonne X
+    (colonne_x, ou la première colonne) et les colonnes de données sont lues.
+    Les messages de lecture passent par afficher (None = silencieux).
+    """
+    if afficher is None:
+        afficher = lambda *args, **kwargs: None
+    if format_source is None:
+        format_source = detecter_format(source)
+    if format_source in ('parquet', 'feather', 'arrow'):
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        return _lire_colonnaire(source, format_source, colonne_x, afficher)
+    
+    if isinstance(source, (bytes, bytearray)):
+        source = BytesIO(source)
+    elif hasattr(source, 'seek'):
+        source.seek(0)
+    
+    if format_source == 'excel':
+        afficher(f"Type de fichier détecté : Excel (.xlsx/.xls)")
+        # Essayer d'abord de lire la feuille "Données", sinon la première feuille
+        try:
+            df = pd.read_excel(source, sheet_name='Données', engine='openpyxl')
+            afficher(f"  - Feuille utilisée : 'Données'")
+        except ValueError:
+            if hasattr(source, 'seek'):
+                source.seek(0)
+            df = pd.read_excel(source, sheet_name=0, engine='openpyxl')
+            afficher(f"  - Feuille utilisée : première feuille")
+        return df
+    
+    afficher(f"Type de fichier détecté : CSV")
+    return pd.read_csv(source)
+
+
+class CacheImages:
+    """
+    Cache disque des images PNG rendues, adressé par leur contenu source
+    
+    La clé est une empreinte SHA-256 de la matrice et de tous les réglages
+    de rendu : une image n'est donc jamais réutilisée à tort. La taille
+    totale est bornée ; les images les moins récemment utilisées (date de
+    modification, rafraîchie à chaque lecture) sont évincées en premier,
+    jusqu'à SEUIL_BAS × taille_max : le dossier n'est reparcouru qu'une fois
+    cette marge consommée, et non à chaque écriture une fois le plafond atteint.
+    
+    Attributs:
+        succes, echecs (int): Compteurs de hits / misses depuis la création
+    """
+    
+    SEUIL_BAS = 0.9  # Fraction de taille_max visée après une éviction
+    
+    def __init__(self, dossier, taille_max=500 * 1024 ** 2):
+        self.dossier = dossier
+        self.taille_max = taille_max
+        self.succes = 0
+        self.echecs = 0
+        self._verrou = threading.Lock()
+        os.makedirs(dossier, exist_ok=True)
+        self._taille = sum(entree.stat().st_size for entree in self._entrees())
+        if self._taille > self.taille_max:
+            self._evincer()
+    
+    @staticmethod
+    def cle(matrice, titre, valeurs_x, groupes, label_x, config, afficher_valeurs=True,
+            palette='rouge', matrice_plot=None, dendrogrammes=None):
+        """
+        Calcule la clé d'une image (mêmes paramètres que rendre_heatmap)
+        """
+        if matrice_plot is None:
+            matrice_plot = transformer_valeurs(matrice, config)
+        empreinte = hashlib.sha256()
+        for tableau in (matrice, matrice_plot):
+            tableau = np.ascontiguousarray(tableau, dtype=float)
+            empreinte.update(repr(tableau.shape).encode())
+            empreinte.update(tableau.tobytes())
+        reglages = (titre, [str(v) for v in valeurs_x], [str(g) for g in groupes], label_x,
+                    palette, repr(_PALETTES.get(palette)), config['echelle_log'], config['dpi'],
+                    tuple(config['taille_heatmap']), afficher_valeurs,
+                    config.get('moteur_rendu', 'matplotlib'))
+        empreinte.update(repr(reglages).encode())
+        if config.get('normalisation'):
+            empreinte.update(libelle_echelle(config).encode())
+        if dendrogrammes is not None:
+            for liaison in dendrogrammes:
+                empreinte.update(b'-' if liaison is None else np.ascontiguousarray(liaison).tobytes())
+        return empreinte.hexdigest()
+    
+    @staticmethod
+    def cle_planche(matrices, titres, valeurs_x, groupes, label_x, config, afficher_valeurs=True,
+                    palette='rouge', matrices_plot=None, disposition=(3, 2), echelle_commune=False,
+                    etiquettes=None, dendrogrammes=None):
+        """
+        Calcule la clé d'une planche (mêmes paramètres que dessiner_planche)
+        """
+        if matrices_plot is None:
+            matrices_plot = [None] * len(matrices)
+        if etiquettes is None:
+            etiquettes = [(valeurs_x, groupes)] * len(matrices)
+        if dendrogrammes is None:
+            dendrogrammes = [None] * len(matrices)
+        empreinte = hashlib.sha256()
+        for matrice, titre, matrice_plot, (valeurs_x, groupes), dendros in zip(
+                matrices, titres, matrices_plot, etiquettes, dendrogrammes):
+            empreinte.update(CacheImages.cle(matrice, titre, valeurs_x, groupes, label_x, config,
+                                             afficher_valeurs, palette, matrice_plot,
+                                             dendros).encode())
+        empreinte.update(repr(('planche', tuple(disposition), echelle_commune)).encode())
+        return empreinte.hexdigest()
+    
+    def _chemin(self, cle):
+        return os.path.join(self.dossier, cle + '.png')
+    
+    def _entrees(self):
+        return [e for e in os.scandir(self.dossier) if e.is_file() and e.name.endswith('.png')]
+    
+    def contient(self, cle):
+        """
+        Indique si l'image est en cache (compté comme hit ou miss)
+        """
+        present = os.path.exists(self._chemin(cle))
+        with self._verrou:
+            if present:
+                self.succes += 1
+            else:
+                self.echecs += 1
+        return present
+    
+    def lire(self, cle):
+        """
+        Retourne l'image (bytes) ou None si elle n'est pas en cache
+        """
+        chemin = self._chemin(cle)
+        try:
+            with open(chemin, 'rb') as f:
+                png = f.read()
+            os.utime(chemin)  # marque l'entrée comme récemment utilisée
+        except FileNotFoundError:
+            return None
+        return png
+    
+    def ecrire(self, cle, png):
+        """
+        Ajoute une image au cache puis évince les plus anciennes si nécessaire
+        """
+        chemin = self._chemin(cle)
+        temporaire = f"{chemin}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporaire, 'wb') as f:
+            f.write(png)
+        os.replace(temporaire, chemin)
+        with self._verrou:
+            self._taille += len(png)
+            if self._taille > self.taille_max:
+                self._evincer()
+    
+    def _evincer(self):
+        entrees = sorted(self._entrees(), key=lambda e: e.stat().st_mtime)
+        self._taille = sum(e.stat().st_size for e in entrees)
+        cible = self.taille_max * self.SEUIL_BAS
+        for entree in entrees:
+            if self._taille <= cible:
+                break
+            try:
+                taille = entree.stat().st_size
+                os.remove(entree.path)
+                self._taille -= taille
+            except FileNotFoundError:
+                pass
+    
+    def vider(self):
+        """
+        Supprime toutes les images du cache
+        """
+        with self._verrou:
+            for entree in self._entrees():
+                os.remove(entree.path)
+            self._taille = 0
+    
+    def statistiques(self):
+        """
+        Retourne les compteurs du cache (hits, misses, taille en octets)
+        """
+        return {'succes': self.succes, 'echecs': self.echecs, 'taille': self._taille}
+
+
+def _egales(a, b):
+    """
+    Comparaison de valeurs de configuration (tuples / listes / tableaux compris)
+    """
+    try:
+        return bool(np.array_equal(a, b)) if isinstance(a, (list, tuple, np.ndarray)) else a == b
+    except (TypeError, ValueError):
+        return False
+
+
+class Instrumentation:
+    """
+    Interface d'instrumentation du générateur (par défaut : aucune action)
+    
+    Le générateur signale le début et la fin de chaque étape avec sa durée
+    (mesurer), des compteurs (lignes, marqueurs, heatmaps, octets écrits,
+    succès du cache...) et des événements ponctuels. Les sous-classes
+    surchargent debut, fin, compter et evenement.
+    """
+    
+    def debut(self, nom, attributs):
+        pass
+    
+    def fin(self, nom, duree, attributs, erreur=None):
+        pass
+    
+    def compter(self, nom, valeur, **attributs):
+        pass
+    
+    def evenement(self, nom, **attributs):
+        pass
+    
+    @contextlib.contextmanager
+    def mesurer(self, nom, **attributs):
+        """
+        Encadre un bloc : debut() à l'entrée, fin() avec la durée (s) à la sortie
+        
+        En cas d'exception, fin() reçoit le nom de son type dans erreur.
+        """
+        self.debut(nom, attributs)
+        debut = time.perf_counter()
+        erreur = None
+        try:
+            yield
+        except BaseException as e:
+            erreur = type(e).__name__
+            raise
+        finally:
+            self.fin(nom, time.perf_counter() - debut, attributs, erreur)
+
+
+class InstrumentationLogging(Instrumentation):
+    """
+    Transmet les mesures au module logging (logger 'heatmap_generator' par défaut)
+    """
+    
+    def __init__(self, logger=None, niveau=logging.INFO):
+        self.logger = logger or logging.getLogger('heatmap_generator')
+        self.niveau = niveau
+    
+    def debut(self, nom, attributs):
+        self.logger.debug("Début %s %s", nom, attributs)
+    
+    def fin(self, nom, duree, attributs, erreur=None):
+        if erreur is None:
+            self.logger.log(self.niveau, "%s : %.3f s %s", nom, duree, attributs)
+        else:
+            self.logger.warning("%s interrompu (%s) après %.3f s %s", nom, erreur, duree, attributs)
+    
+    def compter(self, nom, valeur, **attributs):
+        self.logger.log(self.niveau, "%s = %s %s", nom, valeur, attributs)
+    
+    def evenement(self, nom, **attributs):
+        self.logger.log(self.niveau, "%s %s", nom, attributs)
+
+
+class InstrumentationJSONL(Instrumentation):
+    """
+    Écrit chaque mesure comme une ligne JSON (horodatage, type, nom, valeurs)
+    
+    Paramètres:
+        destination: Chemin du fichier (ouvert en ajout) ou objet fichier texte
+    """
+    
+    def __init__(self, destination):
+        self._proprietaire = isinstance(destination, (str, os.PathLike))
+        self._fichier = open(destination, 'a', encoding='utf-8') if self._proprietaire else destination
+        self._verrou = threading.Lock()
+    
+    def _ecrire(self, type_mesure, nom, **champs):
+        ligne = json.dumps({'horodatage': time.time(), 'type': type_mesure, 'nom': nom, **champs},
+                           ensure_ascii=False, default=str)
+        with self._verrou:
+            self._fichier.write(ligne + '\n')
+            self._fichier.flush()
+    
+    def debut(self, nom, attributs):
+        self._ecrire('debut', nom, attributs=attributs)
+    
+    def fin(self, nom, duree, attributs, erreur=None):
+        self._ecrire('fin', nom, duree_s=duree, attributs=attributs, erreur=erreur)
+    
+    def compter(self, nom, valeur, **attributs):
+        self._ecrire('compteur', nom, valeur=valeur, attributs=attributs)
+    
+    def evenement(self, nom, **attributs):
+        self._ecrire('evenement', nom, attributs=attributs)
+    
+    def fermer(self):
+        """
+        Ferme le fichier s'il a été ouvert par cette instance
+        """
+        if self._proprietaire:
+            self._fichier.close()
+
+
+def _etape_mesuree(etape):
+    """
+    Décorateur : encadre une méthode du générateur par instrumentation.mesurer(etape)
+    """
+    def decorateur(methode):
+        @wraps(methode)
+        def enveloppe(self, *args, **kwargs):
+            with self.instrumentation.mesurer(etape):
+                return methode(self, *args, **kwargs)
+        return enveloppe
+    return decorateur
+
+
+MAX_HEATMAPS_PAR_SLIDE = 9  # Disposition la plus dense : grille 3 × 3
+
+
+class GenerationAnnulee(Exception):
+    """
+    Levée quand une génération est interrompue par HeatmapGenerator.annuler()
+    (ou par le callback de progression)
+    """
+
+
 class HeatmapGenerator:
     """
     Générateur de heatmaps ultra-flexible pour données expérimentales
     """
     
-    def __init__(self, fichier_csv, config=None):
+    # Graphe des étapes : étape -> étape dont elle dépend
+    ETAPES = {
+        'chargement': None,
+        'matrices': 'chargement',
+        'transformation': 'matrices',
+        'rendu': 'transformation',
+        'assemblage': 'rendu',
+    }
+    
+    # Clés de configuration lues par chaque étape (les autres clés n'invalident rien)
+    DEPENDANCES_CONFIG = {
+        'chargement': ('colonne_x', 'lecture_par_blocs'),
+        'matrices': (),
+        'transformation': ('echelle_log', 'statistique', 'statistique_valeurs',
+                           'normalisation', 'groupe_reference', 'x_reference',
+                           'clustering_lignes', 'clustering_groupes', 'clustering_marqueurs',
+                           'methode_clustering', 'metrique_clustering'),
+        'rendu': ('palette', 'afficher_valeurs', 'label_axe_x', 'taille_heatmap', 'dpi',
+                  'moteur_rendu', 'dendrogrammes'),
+        'assemblage': ('max_heatmaps_par_slide', 'titre_presentation', 'sous_titre',
+                       'heatmaps_natives', 'planches_composites', 'echelle_commune',
+                       'marqueurs_par_fichier', 'octets_par_fichier'),
+    }
+    
+    def __init__(self, fichier_csv, config=None, progression=None, instrumentation=None):
         """
         Initialise le générateur
         
         Paramètres:
-            fichier_csv (str): Chemin vers le fichier (CSV ou Excel)
+            fichier_csv: Source des données : chemin vers le fichier (CSV ou
+                         Excel), contenu en mémoire (bytes, BytesIO, fichier
+                         uploadé) ou DataFrame déjà chargé
             config (dict): Configuration optionnelle
+            progression: Callback optionnel progression(etape, fait, total),
+                         appelé après chaque bloc lu, heatmap rendue et
+                         étape terminée (total vaut None s'il est inconnu).
+                         Il peut lever GenerationAnnulee pour interrompre.
+            instrumentation (Instrumentation): Reçoit durées des étapes,
+                         compteurs et événements (défaut : aucune action)
         """
         self.fichier_csv = fichier_csv
         self.config = config or {}
+        self.progression = progression
+        self.instrumentation = instrumentation or Instrumentation()
+        self._annulation = False
         self.data = None
         self.marqueurs = []
         self.valeurs_x = []  # Anciennement temps_labels, maintenant générique
         self.groupes = []
         self.nom_colonne_x = None  # Nom détecté de la première colonne
+        self.schema = None  # Structure des colonnes (SchemaColonnes)
+        self.cache_images = None  # CacheImages, créé à la demande
+        self.statistiques = {}  # Tenseurs (marqueur, valeur_x, groupe) par statistique
+        self._agregats_blocs = None  # Moments cumulés par la lecture par blocs (None sinon)
+        self.normalisations = {}  # Tenseurs normalisés, par (statistique, mode, référence)
+        self._selection = None  # (statistique des couleurs, des valeurs) de self.matrices et self.couleurs
+        self.matrices_plot = {}  # Valeurs transformées (couleurs), vues sur tenseur_plot
+        self.liaisons = {}  # (liaison des lignes, des groupes) par marqueur, None = ordre du fichier
+        self.liaison_marqueurs = None  # Liaison du regroupement des marqueurs
+        self.ordre_marqueurs = []  # Ordre des heatmaps dans la présentation
+        self.images = {}  # PNG rendus par generer(), par marqueur
+        self._etapes_valides = set()
         
         # Configuration par défaut
         self.default_config = {
             'colonne_x': None,  # None = détection automatique (première colonne)
             'label_axe_x': None,  # None = utilise le nom de la colonne
             'echelle_log': True,
+            'statistique': 'moyenne',  # Statistique des couleurs (voir STATISTIQUES)
+            'statistique_valeurs': None,  # Statistique écrite dans les cellules (None = la même)
+            'normalisation': None,  # Voir NORMALISATIONS (None = échelle log ou valeurs brutes)
+            'groupe_reference': None,  # Fold changes : groupe de référence...
+            'x_reference': None,  # ... ou valeur X de référence
+            'palette': 'rouge',
+            'afficher_valeurs': True,
+            'clustering_lignes': False,  # Regroupement hiérarchique des valeurs X de chaque heatmap
+            'clustering_groupes': False,  # ... des groupes de chaque heatmap
+            'clustering_marqueurs': False,  # ... des marqueurs (ordre des heatmaps dans la présentation)
+            'methode_clustering': 'average',  # Voir METHODES_CLUSTERING
+            'metrique_clustering': 'euclidean',  # Voir METRIQUES_CLUSTERING
+            'dendrogrammes': False,  # Dendrogrammes autour des heatmaps et slide des marqueurs
             'taille_heatmap': (3.5, 4),
             'dpi': 150,
             'max_heatmaps_par_slide': 6,
+            'processus_rendu': 1,  # >1 = rendu parallèle, None = tous les cœurs
+            'moteur_rendu': 'matplotlib',  # 'matplotlib', 'reutilisation' ou 'raster'
+            'heatmaps_natives': False,  # Tableaux PowerPoint modifiables au lieu d'images
+            'planches_composites': False,  # Une seule image (figure multi-panneaux) par slide
+            'echelle_commune': False,  # Planches : même échelle de couleurs, une seule colorbar
+            'marqueurs_par_fichier': None,  # Découpage en plusieurs .pptx (archive ZIP) : marqueurs max par partie...
+            'octets_par_fichier': None,  # ... et/ou octets d'images max par partie (None = pas de découpage)
+            'cache_images': None,  # Dossier du cache disque des images (None = désactivé)
+            'cache_images_taille_max': 500 * 1024 ** 2,  # Octets
+            'lecture_par_blocs': None,  # Lignes par bloc pour lire les CSV en flux (None = lecture complète)
+            'verbeux': True,  # Messages de suivi sur la console (False = silencieux)
             'titre_presentation': 'Analyse des résultats expérimentaux',
             'sous_titre': 'Heatmaps - Données quantitatives'
         }
@@ -59,269 +1839,756 @@ class HeatmapGenerator:
         for key, value in self.default_config.items():
             if key not in self.config:
                 self.config[key] = value
+        self._verifier_config()
+    
+    def _verifier_config(self):
+        # Réglages qui, invalides, n'échoueraient qu'à l'assemblage (ou en silence)
+        max_par_slide = self.config['max_heatmaps_par_slide']
+        if isinstance(max_par_slide, bool) or not isinstance(max_par_slide, (int, np.integer)) \
+                or not 1 <= max_par_slide <= MAX_HEATMAPS_PAR_SLIDE:
+            raise ValueError(f"max_heatmaps_par_slide doit être un entier de 1 à "
+                             f"{MAX_HEATMAPS_PAR_SLIDE} (reçu : {max_par_slide!r})")
+    
+    def __getstate__(self):
+        # Le callback (souvent une fermeture liée à une interface),
+        # l'instrumentation (fichier ouvert, logger) et le cache d'images
+        # (verrou, recréé à la demande) ne sont transmis ni aux copies ni
+        # aux processus
+        etat = self.__dict__.copy()
+        etat['progression'] = None
+        etat['instrumentation'] = Instrumentation()
+        etat['cache_images'] = None
+        etat['_annulation'] = False
+        return etat
+    
+    def _afficher(self, *args, **kwargs):
+        # Messages de suivi sur la console, sauf si config['verbeux'] est False
+        if self.config['verbeux']:
+            print(*args, **kwargs)
+    
+    def annuler(self):
+        """
+        Demande l'interruption de la génération en cours (depuis un autre thread)
+        
+        La génération lève GenerationAnnulee au prochain point de progression ;
+        les étapes déjà terminées restent valides et ne seront pas recalculées.
+        """
+        self._annulation = True
+    
+    def _verifier_annulation(self, etape):
+        # Lève GenerationAnnulee si annuler() a été appelé
+        if self._annulation:
+            self._annulation = False
+            self.instrumentation.evenement('annulation', etape=etape)
+            raise GenerationAnnulee(f"Génération annulée (étape : {etape})")
+    
+    def _signaler(self, etape, fait, total, annulable=True):
+        # Point de progression : vérifie l'annulation puis notifie le callback.
+        # annulable=False : travail déjà écrit, une annulation arrivée trop tard
+        # (annuler() ou levée par le callback) est ignorée
+        if annulable:
+            self._verifier_annulation(etape)
+        if self.progression is not None:
+            try:
+                self.progression(etape, fait, total)
+            except GenerationAnnulee:
+                if annulable:
+                    raise
+    
+    def _descendants(self, etape):
+        """
+        Retourne l'étape et toutes celles qui en dépendent, dans l'ordre
+        """
+        etapes = [etape]
+        for suivante, parent in self.ETAPES.items():
+            if parent in etapes:
+                etapes.append(suivante)
+        return etapes
+    
+    def _valider_etape(self, etape):
+        # Une étape recalculée rend obsolètes toutes celles qui en dépendent
+        self._etapes_valides.difference_update(self._descendants(etape))
+        self._etapes_valides.add(etape)
+    
+    def etapes_a_recalculer(self):
+        """
+        Retourne les étapes invalidées (ou jamais exécutées), dans l'ordre
+        """
+        return [etape for etape in self.ETAPES if etape not in self._etapes_valides]
+    
+    def modifier_config(self, **modifications):
+        """
+        Modifie la configuration et invalide uniquement les étapes concernées
+        
+        Exemple : modifier_config(palette='viridis') n'invalide que le rendu
+        et l'assemblage ; les données et matrices restent en place.
+        
+        Retourne:
+            list: Étapes invalidées par les modifications
+        """
+        modifiees = [cle for cle, valeur in modifications.items()
+                     if cle not in self.config or not _egales(self.config[cle], valeur)]
+        precedente = dict(self.config)
+        self.config.update(modifications)
+        try:
+            self._verifier_config()
+        except ValueError:
+            # Configuration inchangée si refusée
+            self.config.clear()
+            self.config.update(precedente)
+            raise
+        
+        invalidees = []
+        for etape, cles in self.DEPENDANCES_CONFIG.items():
+            if etape not in invalidees and any(cle in modifiees for cle in cles):
+                invalidees.extend(e for e in self._descendants(etape) if e not in invalidees)
+        self._etapes_valides.difference_update(invalidees)
+        return [etape for etape in self.ETAPES if etape in invalidees]
+    
+    @_etape_mesuree('generation')
+    def generer(self, fichier_sortie):
+        """
+        Produit la présentation en n'exécutant que les étapes invalidées
+        
+        Au premier appel, toutes les étapes sont exécutées ; ensuite, après
+        modifier_config(), seules les étapes dépendant des clés modifiées
+        sont recalculées. Les images rendues sont conservées dans self.images,
+        sauf en mode découpé (voir creer_presentation) où elles sont rendues
+        au fil de l'assemblage pour borner la mémoire.
+        fichier_sortie est un chemin ou un objet fichier binaire (BytesIO...).
+        
+        Retourne:
+            list: Étapes exécutées
+        """
+        # Une annulation demandée hors génération ne vise pas celle-ci
+        self._annulation = False
+        self._verifier_sortie(fichier_sortie)
+        actions = {
+            'chargement': self.charger_donnees,
+            'matrices': self.calculer_matrices,
+            'transformation': self.transformer_matrices,
+            'rendu': self.rendre_heatmaps,
+        }
+        if self.config['heatmaps_natives'] or self.config['planches_composites'] \
+                or self._decoupage():
+            # Heatmaps dessinées à l'assemblage (formes natives, une planche
+            # par slide selon la disposition, ou mode découpé) : pas d'images
+            # individuelles conservées
+            del actions['rendu']
+        executees = []
+        for etape in self.etapes_a_recalculer():
+            if etape in actions:
+                actions[etape]()
+                executees.append(etape)
+        
+        # L'assemblage (écriture de la présentation) est toujours exécuté
+        self.creer_presentation(fichier_sortie)
+        executees.append('assemblage')
+        return executees
     
+    @_etape_mesuree('chargement')
     def charger_donnees(self):
         """
         Charge et analyse automatiquement la structure du fichier (CSV ou Excel)
         """
-        print("\n" + "=" * 80)
-        print("ANALYSE DU FICHIER DE DONNÉES")
-        print("=" * 80 + "\n")
+        self._afficher("\n" + "=" * 80)
+        self._afficher("ANALYSE DU FICHIER DE DONNÉES")
+        self._afficher("=" * 80 + "\n")
         
-        # Déterminer le type de fichier et charger
-        if self.fichier_csv.endswith('.xlsx') or self.fichier_csv.endswith('.xls'):
-            print(f"Type de fichier détecté : Excel (.xlsx/.xls)")
-            # Essayer d'abord de lire la feuille "Données", sinon la première feuille
-            try:
-                df = pd.read_excel(self.fichier_csv, sheet_name='Données', engine='openpyxl')
-                print(f"  - Feuille utilisée : 'Données'")
-            except:
-                df = pd.read_excel(self.fichier_csv, sheet_name=0, engine='openpyxl')
-                print(f"  - Feuille utilisée : première feuille")
-        elif self.fichier_csv.endswith('.csv'):
-            print(f"Type de fichier détecté : CSV")
-            df = pd.read_csv(self.fichier_csv)
+        # Statistiques du chargement précédent périmées
+        self.statistiques = {}
+        self._agregats_blocs = None
+        
+        source = self.fichier_csv
+        if isinstance(source, pd.DataFrame):
+            self._afficher(f"Type de source : DataFrame en mémoire")
+            df = source
         else:
-            raise ValueError(f"Format de fichier non supporté. Utilisez .xlsx, .xls ou .csv")
+            format_source = detecter_format(source)
+            
+            # Lecture par blocs des gros CSV : le DataFrame complet n'est jamais construit
+            taille_bloc = self.config['lecture_par_blocs']
+            if taille_bloc and format_source == 'csv':
+                n_lignes = self._charger_csv_par_blocs(taille_bloc)
+                self._valider_etape('chargement')
+                self.instrumentation.compter('lignes', n_lignes)
+                self._signaler('chargement', n_lignes, n_lignes)
+                return
+            
+            with self.instrumentation.mesurer('lecture', format=format_source):
+                df = lire_tableau(source, format_source, self.config['colonne_x'], self._afficher)
+        
+        self._afficher(f"✓ Fichier chargé : {self._nom_source()}")
+        self._afficher(f"  - Dimensions brutes : {df.shape[0]} lignes × {df.shape[1]} colonnes")
         
-        print(f"✓ Fichier chargé : {self.fichier_csv}")
-        print(f"  - Dimensions brutes : {df.shape[0]} lignes × {df.shape[1]} colonnes")
+        colonne_x = self._determiner_colonne_x(df.columns)
         
+        # Nettoyer les données
+        df = self._nettoyer_lignes(df, colonne_x)
+        
+        self._afficher(f"  - Dimensions nettoyées : {df.shape[0]} lignes × {df.shape[1]} colonnes")
+        
+        # Extraire les valeurs de la colonne X (une par valeur distincte)
+        self.valeurs_x = pd.unique(df[colonne_x]).tolist()
+        if len(self.valeurs_x) < len(df):
+            self._afficher(f"  - {len(df) - len(self.valeurs_x)} lignes de valeur X répétée "
+                           f"(réplicats regroupés)")
+        self._afficher(f"  - {len(self.valeurs_x)} valeurs sur l'axe X : {self.valeurs_x}")
+        
+        self._analyser_schema(df.columns)
+        
+        # Stocker les données
+        self.data = df
+        self._valider_etape('chargement')
+        self.instrumentation.compter('lignes', len(df))
+        self._signaler('chargement', len(df), len(df))
+    
+    def _nom_source(self):
+        """
+        Nom lisible de la source de données (chemin, nom d'upload ou type)
+        """
+        source = self.fichier_csv
+        if isinstance(source, (str, os.PathLike)):
+            return os.fspath(source)
+        return getattr(source, 'name', None) or type(source).__name__
+    
+    def _determiner_colonne_x(self, colonnes):
+        """
+        Détermine la colonne X (config ou première colonne) et vérifie sa présence
+        """
         # Détecter automatiquement la colonne X (première colonne) si non spécifiée
         if self.config['colonne_x'] is None:
-            colonne_x = df.columns[0]
-            print(f"  - Détection automatique : première colonne = '{colonne_x}'")
+            colonne_x = colonnes[0]
+            self._afficher(f"  - Détection automatique : première colonne = '{colonne_x}'")
         else:
             colonne_x = self.config['colonne_x']
-            print(f"  - Colonne X spécifiée : '{colonne_x}'")
+            self._afficher(f"  - Colonne X spécifiée : '{colonne_x}'")
         
-        self.nom_colonne_x = colonne_x
+        if colonne_x not in colonnes:
+            raise ValueError(f"Colonne '{colonne_x}' non trouvée. Colonnes disponibles : {list(colonnes)}")
         
-        # Nettoyer les données
-        if colonne_x in df.columns:
-            # Supprimer les lignes où la colonne X est NaN ou vide
-            df = df.dropna(subset=[colonne_x])
-            
-            # Supprimer les lignes avec texte long (instructions, notes)
-            df = df[df[colonne_x].astype(str).str.len() < 20]
-            
-            # Supprimer les lignes avec emoji ou marqueurs d'instruction
-            df = df[~df[colonne_x].astype(str).str.contains('📝|INSTRUCTION|Note|INFO|AIDE', case=False, na=False)]
-        else:
-            raise ValueError(f"Colonne '{colonne_x}' non trouvée. Colonnes disponibles : {list(df.columns)}")
+        self.nom_colonne_x = colonne_x
+        return colonne_x
+    
+    @staticmethod
+    def _nettoyer_lignes(df, colonne_x):
+        """
+        Supprime les lignes sans valeur X et les lignes de notes / instructions
+        """
+        # Supprimer les lignes où la colonne X est NaN ou vide
+        df = df.dropna(subset=[colonne_x])
         
-        print(f"  - Dimensions nettoyées : {df.shape[0]} lignes × {df.shape[1]} colonnes")
+        # Supprimer les lignes avec texte long (instructions, notes)
+        df = df[df[colonne_x].astype(str).str.len() < 20]
         
-        # Extraire les valeurs de la colonne X
-        self.valeurs_x = df[colonne_x].tolist()
-        print(f"  - {len(self.valeurs_x)} valeurs sur l'axe X : {self.valeurs_x}")
+        # Supprimer les lignes avec emoji ou marqueurs d'instruction
+        df = df[~df[colonne_x].astype(str).str.contains('📝|INSTRUCTION|Note|INFO|AIDE', case=False, na=False)]
         
+        return df
+    
+    def _analyser_schema(self, colonnes):
+        """
+        Détecte marqueurs et groupes (analyse unique des en-têtes)
+        """
         # Identifier les colonnes de données (toutes sauf la première)
-        colonnes_donnees = [col for col in df.columns if col != colonne_x]
-        
-        if not colonnes_donnees:
+        if len(colonnes) < 2:
             raise ValueError("Aucune colonne de données trouvée (hormis la colonne X)")
         
-        # Détecter marqueurs et groupes
-        self.marqueurs = self._detecter_marqueurs(colonnes_donnees)
-        self.groupes = self._detecter_groupes(colonnes_donnees, self.marqueurs)
+        self.schema = analyser_colonnes(colonnes, self.nom_colonne_x)
+        # Copies : le schéma (immuable) est partagé via le cache
+        self.marqueurs = list(self.schema.marqueurs)
+        self.groupes = list(self.schema.groupes)
+        
+        self._afficher(f"  - {len(self.marqueurs)} marqueurs détectés : {self.marqueurs}")
+        self._afficher(f"  - {len(self.groupes)} groupes détectés : {self.groupes}")
+        self.instrumentation.compter('colonnes', len(colonnes))
+        self.instrumentation.compter('marqueurs', len(self.marqueurs))
+        self.instrumentation.compter('groupes', len(self.groupes))
+    
+    def _charger_csv_par_blocs(self, taille_bloc):
+        """
+        Lit un CSV par blocs de lignes et agrège les réplicats au fil de l'eau
         
-        print(f"  - {len(self.marqueurs)} marqueurs détectés : {self.marqueurs}")
-        print(f"  - {len(self.groupes)} groupes détectés : {self.groupes}")
+        La colonne X est lue en texte (labels identiques d'un bloc à l'autre).
+        Chaque bloc est nettoyé comme en lecture complète, puis ses réplicats
+        sont réduits en effectifs, moyennes et sommes des carrés des écarts
+        par (marqueur, valeur X, groupe) ; les lignes d'une même valeur X sont
+        cumulées, y compris d'un bloc à l'autre, par la formule de fusion de
+        Chan (stable même pour des valeurs très décalées de zéro). Le DataFrame complet n'est
+        jamais construit : self.data reste None et calculer_matrices part des
+        agrégats (toutes les statistiques sauf la médiane, qui exige toutes
+        les valeurs).
         
-        # Stocker les données
-        self.data = df
+        Retourne:
+            int: Nombre de lignes retenues après nettoyage
+        """
+        self._afficher(f"Type de fichier détecté : CSV (lecture par blocs de {taille_bloc} lignes)")
+        source = self.fichier_csv
+        if isinstance(source, (bytes, bytearray)):
+            source = BytesIO(source)
+        elif hasattr(source, 'seek'):
+            source.seek(0)
+        
+        self.valeurs_x = []
+        index_x = {}
+        cumuls = None  # Effectifs, moyennes, sommes des carrés des écarts (marqueur, capacité X, groupe)
+        n_blocs = n_lignes_brutes = n_lignes = 0
+        
+        # En-tête lu d'abord, pour lire la colonne X en texte dans tous les
+        # blocs : le type étant inféré bloc par bloc, un bloc purement
+        # numérique donnerait 6 et un bloc contenant une note '6'
+        colonnes = pd.read_csv(source, nrows=0).columns
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        colonne_x = self._determiner_colonne_x(colonnes)
+        self._analyser_schema(colonnes)
+        
+        for bloc in pd.read_csv(source, chunksize=taille_bloc, dtype={colonne_x: str}):
+            n_lignes_brutes += len(bloc)
+            bloc = self._nettoyer_lignes(bloc, colonne_x)
+            
+            # Code de chaque ligne ; les valeurs X nouvelles sont ajoutées à l'axe
+            codes = []
+            for val_x in bloc[colonne_x].tolist():
+                code = index_x.get(val_x)
+                if code is None:
+                    code = index_x[val_x] = len(index_x)
+                    self.valeurs_x.append(val_x)
+                codes.append(code)
+            n_lignes += len(codes)
+            
+            # Moments centrés par valeur X distincte du bloc
+            codes_bloc, inverses = np.unique(np.asarray(codes, dtype=np.intp), return_inverse=True)
+            valeurs = bloc.iloc[:, self.schema.positions].to_numpy(dtype=float)
+            effectifs_bloc, sommes_bloc, m2_bloc = _moments_replicats(
+                _tenseur_replicats(valeurs, self.schema), inverses, len(codes_bloc))
+            
+            # Cumul immédiat par valeur X : la mémoire suit le nombre de valeurs
+            # X distinctes, pas le nombre de lignes (capacité doublée au besoin)
+            if cumuls is None or cumuls[0].shape[1] < len(index_x):
+                capacite = max(len(index_x), 2 * (cumuls[0].shape[1] if cumuls else 0))
+                forme = (len(self.marqueurs), capacite, len(self.groupes))
+                agrandis = [np.zeros(forme) for _ in range(3)]
+                if cumuls is not None:
+                    for agrandi, cumul in zip(agrandis, cumuls):
+                        agrandi[:, :cumul.shape[1]] = cumul
+                cumuls = agrandis
+            effectifs, moyennes, m2 = (cumul[:, codes_bloc] for cumul in cumuls)
+            total = effectifs + effectifs_bloc
+            with np.errstate(invalid='ignore', divide='ignore'):
+                moyennes_bloc = np.where(effectifs_bloc > 0, sommes_bloc / effectifs_bloc, 0.0)
+                poids = np.where(total > 0, effectifs_bloc / total, 0.0)
+            ecarts = moyennes_bloc - moyennes
+            cumuls[0][:, codes_bloc] = total
+            cumuls[1][:, codes_bloc] = moyennes + ecarts * poids
+            cumuls[2][:, codes_bloc] = m2 + m2_bloc + ecarts ** 2 * effectifs * poids
+            n_blocs += 1
+            # Nombre total de lignes inconnu tant que le fichier n'est pas lu
+            self._signaler('chargement', n_lignes_brutes, None)
+        
+        if n_lignes_brutes == 0:
+            raise ValueError(f"Fichier vide : {self._nom_source()}")
+        
+        self._afficher(f"✓ Fichier chargé : {self._nom_source()}")
+        self._afficher(f"  - Dimensions brutes : {n_lignes_brutes} lignes × {len(self.schema.colonnes)} colonnes")
+        self._afficher(f"  - Dimensions nettoyées : {n_lignes} lignes × {len(self.schema.colonnes)} colonnes")
+        self._afficher(f"  - {len(self.valeurs_x)} valeurs sur l'axe X : {self.valeurs_x}")
+        self.instrumentation.compter('blocs', n_blocs)
+        
+        n_x = len(self.valeurs_x)
+        if cumuls is None:
+            cumuls = [np.zeros((len(self.marqueurs), 0, len(self.groupes))) for _ in range(3)]
+        effectifs, moyennes, m2 = (cumul[:, :n_x] for cumul in cumuls)
+        
+        self.data = None
+        self._agregats_blocs = (effectifs.astype(np.intp), moyennes * effectifs, m2)
+        return n_lignes
     
     def _detecter_marqueurs(self, colonnes):
         """
         Détecte automatiquement les marqueurs depuis les noms de colonnes
         Format attendu : Marqueur_Groupe_Réplicat
         """
-        marqueurs = set()
-        
-        for col in colonnes:
-            # Essayer différents séparateurs
-            for sep in ['_', '-', '.']:
-                if sep in col:
-                    # Le marqueur est le premier élément
-                    marqueur = col.split(sep)[0]
-                    marqueurs.add(marqueur)
-                    break
-        
-        return sorted(list(marqueurs))
+        return list(analyser_colonnes(colonnes).marqueurs)
     
     def _detecter_groupes(self, colonnes, marqueurs):
         """
         Détecte automatiquement les groupes de traitement
         """
-        groupes = set()
-        
-        for col in colonnes:
-            # Essayer différents séparateurs
-            for sep in ['_', '-', '.']:
-                if sep in col:
-                    parties = col.split(sep)
-                    if len(parties) >= 2:
-                        # Le groupe est l'élément entre le marqueur et le numéro de réplicat
-                        marqueur = parties[0]
-                        if marqueur in marqueurs:
-                            groupe = parties[1]
-                            # Vérifier que ce n'est pas juste un numéro (réplicat)
-                            if not groupe.isdigit():
-                                groupes.add(groupe)
-                    break
-        
-        return sorted(list(groupes))
+        schema = analyser_colonnes(colonnes)
+        groupes = {g for m, g in zip(schema.marqueur, schema.groupe)
+                   if m in marqueurs and not g.isdigit()}
+        return sorted(groupes)
     
+    @_etape_mesuree('matrices')
     def calculer_matrices(self):
         """
         Calcule les matrices de données pour chaque marqueur
-        Format: [valeurs_x × groupes] avec les moyennes des réplicats
+        Format: [valeurs_x × groupes], une matrice par statistique des réplicats
+        
+        Les colonnes sont lues depuis self.schema (analysé au chargement).
+        Les données sont rangées dans un tenseur dense
+        (marqueur, ligne, groupe, réplicat) ; les lignes d'une même valeur X
+        sont mises en commun par réduction par segments (sans remplissage),
+        et toutes les STATISTIQUES sont calculées de façon vectorisée
+        (NaN ignorés) et conservées dans
+        self.statistiques. Une cellule sans réplicat vaut NaN (cellule vide).
+        Après une lecture par blocs, les moments déjà cumulés sont utilisés
+        (pas de médiane).
+        
+        self.matrices contient des vues sur self.tenseur_matrices, la
+        statistique choisie par config['statistique_valeurs'] (ou 'statistique'),
+        et self.couleurs celles de config['statistique'].
         """
-        print("\n" + "=" * 80)
-        print("CALCUL DES MATRICES DE DONNÉES")
-        print("=" * 80 + "\n")
+        self._afficher("\n" + "=" * 80)
+        self._afficher("CALCUL DES MATRICES DE DONNÉES")
+        self._afficher("=" * 80 + "\n")
         
-        self.matrices = {}
-        colonne_x = self.nom_colonne_x
+        self._signaler('matrices', 0, 1)
+        if self.data is None:
+            # Chargement par blocs : moments déjà cumulés par valeur X distincte
+            self.statistiques = _statistiques_moments(*self._agregats_blocs)
+        else:
+            # Codes dans l'ordre de self.valeurs_x (première apparition)
+            codes_x, _ = pd.factorize(self.data[self.nom_colonne_x])
+            valeurs = self.data.iloc[:, self.schema.positions].to_numpy(dtype=float)
+            self.statistiques = _agreger_replicats(
+                _tenseur_replicats(valeurs, self.schema), codes_x, len(self.valeurs_x))
         
+        self.normalisations = {}
+        self._selection = None
+        self._selectionner_statistiques()
         for marqueur in self.marqueurs:
-            # Initialiser matrice
-            matrice = np.zeros((len(self.valeurs_x), len(self.groupes)))
-            
-            # Pour chaque groupe
-            for j, groupe in enumerate(self.groupes):
-                # Trouver toutes les colonnes pour ce marqueur et ce groupe
-                colonnes_replicats = []
-                for col in self.data.columns:
-                    if col != colonne_x:
-                        # Vérifier si la colonne correspond au marqueur et groupe
-                        for sep in ['_', '-', '.']:
-                            if sep in col:
-                                parties = col.split(sep)
-                                if len(parties) >= 2:
-                                    if parties[0] == marqueur and parties[1] == groupe:
-                                        colonnes_replicats.append(col)
-                                break
-                
-                # Calculer moyennes pour chaque valeur X
-                for i, val_x in enumerate(self.valeurs_x):
-                    valeurs_replicats = []
-                    for col_rep in colonnes_replicats:
-                        val = self.data.loc[self.data[colonne_x] == val_x, col_rep].values
-                        if len(val) > 0 and not np.isnan(val[0]):
-                            valeurs_replicats.append(val[0])
-                    
-                    if valeurs_replicats:
-                        matrice[i, j] = np.mean(valeurs_replicats)
-                    else:
-                        matrice[i, j] = 0
-            
-            self.matrices[marqueur] = matrice
-            print(f"✓ {marqueur:<20} : matrice {len(self.valeurs_x)}×{len(self.groupes)}")
+            self._afficher(f"✓ {marqueur:<20} : matrice {len(self.valeurs_x)}×{len(self.groupes)}")
+        # Calcul vectorisé en une passe : une seule étape de progression
+        self._signaler('matrices', 1, 1)
+        
+        self._valider_etape('matrices')
     
-    def creer_heatmap(self, marqueur, afficher_valeurs=True, palette='rouge'):
-        """
-        Crée une heatmap pour un marqueur donné
+    def _statistique(self, nom):
         """
-        matrice = self.matrices[marqueur]
+        Tenseur (marqueur, valeur_x, groupe) d'une statistique calculée
         
-        # Appliquer échelle logarithmique si demandé
-        if self.config['echelle_log']:
-            matrice_plot = np.log10(matrice + 1)
-        else:
-            matrice_plot = matrice
-        
-        # Définir les palettes de couleurs
-        palettes = {
-            'rouge': ['#FFFFFF', '#FFF5E6', '#FFE6CC', '#FFD9B3', '#FFCC99', 
-                     '#FFB366', '#FF9933', '#FF8000', '#E67300', '#CC6600',
-                     '#B35900', '#994C00', '#803F00'],
-            'bleu': ['#FFFFFF', '#E6F2FF', '#CCE5FF', '#B3D9FF', '#99CCFF',
-                    '#80BFFF', '#66B3FF', '#4DA6FF', '#3399FF', '#1A8CFF',
-                    '#0080FF', '#0073E6', '#0066CC'],
-            'vert': ['#FFFFFF', '#E6F9E6', '#CCF2CC', '#B3ECB3', '#99E699',
-                    '#80DF80', '#66D966', '#4DD34D', '#33CC33', '#1AC61A',
-                    '#00BF00', '#00B300', '#00A600'],
-            'viridis': plt.cm.viridis(np.linspace(0, 1, 13)),
-            'plasma': plt.cm.plasma(np.linspace(0, 1, 13))
-        }
+        Les matrices sont calculées à la demande si elles ne l'ont pas encore été.
+        """
+        if nom not in STATISTIQUES:
+            raise ValueError(f"Statistique inconnue : '{nom}'. "
+                             f"Statistiques disponibles : {list(STATISTIQUES)}")
+        if not self.statistiques:
+            if self.data is None and self._agregats_blocs is None:
+                raise ValueError(f"Statistique '{nom}' non calculée : données non chargées "
+                                 f"(appeler charger_donnees())")
+            self.calculer_matrices()
+        if nom not in self.statistiques:
+            # Seule la lecture par blocs omet une statistique (la médiane)
+            raise ValueError(f"Statistique '{nom}' indisponible avec la lecture par blocs "
+                             f"(la médiane exige toutes les valeurs : lecture_par_blocs=None)")
+        return self.statistiques[nom]
+    
+    def _selectionner_statistiques(self):
+        # Matrices annotées (config['statistique_valeurs'], ou la statistique
+        # des couleurs) et valeurs brutes des couleurs (config['statistique']) ;
+        # rien n'est refait si la sélection n'a pas changé
+        selection = (self.config['statistique'],
+                     self.config['statistique_valeurs'] or self.config['statistique'])
+        if selection == self._selection:
+            return
+        self.tenseur_couleurs = self._statistique(selection[0]).astype(float, copy=False)
+        self.tenseur_matrices = self._statistique(selection[1]).astype(float, copy=False)
+        self.couleurs = {marqueur: self.tenseur_couleurs[k]
+                         for k, marqueur in enumerate(self.marqueurs)}
+        self.matrices = {marqueur: self.tenseur_matrices[k]
+                         for k, marqueur in enumerate(self.marqueurs)}
+        self._selection = selection
+    
+    @_etape_mesuree('transformation')
+    def transformer_matrices(self):
+        """
+        Applique la transformation d'affichage à tous les marqueurs : la
+        normalisation de config['normalisation'], sinon l'échelle log
         
-        # Créer colormap
-        if palette in ['viridis', 'plasma']:
-            cmap = LinearSegmentedColormap.from_list(palette, palettes[palette], N=100)
+        Une seule opération sur le tenseur complet de config['statistique'] ;
+        self.matrices_plot contient des vues sur self.tenseur_plot. Les
+        statistiques étant déjà calculées, en changer ne relance que cette
+        étape ; les tenseurs normalisés sont conservés dans self.normalisations,
+        donc revenir à un mode déjà utilisé ne recalcule rien.
+        """
+        self._selectionner_statistiques()
+        valeurs = self.tenseur_couleurs
+        mode = self.config['normalisation']
+        if mode:
+            cle = (self.config['statistique'], mode, self._reference_normalisation(mode))
+            if cle not in self.normalisations:
+                self.normalisations[cle] = normaliser(valeurs, mode, cle[2])
+            self.tenseur_plot = self.normalisations[cle]
         else:
-            cmap = LinearSegmentedColormap.from_list(palette, palettes[palette], N=100)
+            self.tenseur_plot = transformer_valeurs(valeurs, self.config)
+        self._regrouper()
+        self.matrices_plot = {marqueur: self.tenseur_plot[k]
+                              for k, marqueur in enumerate(self.marqueurs)}
+        self._valider_etape('transformation')
+        self._signaler('transformation', 1, 1)
+    
+    def _reference_normalisation(self, mode):
+        """
+        Référence d'un fold change, ('groupe', indice) ou ('x', indice) ; None pour les autres modes
         
-        # Créer figure
-        fig, ax = plt.subplots(figsize=self.config['taille_heatmap'], dpi=self.config['dpi'])
+        Les labels sont comparés sous forme de texte (une valeur X 10 lue
+        depuis Excel correspond à '10').
+        """
+        if mode not in FOLD_CHANGES:
+            return None
+        groupe, val_x = self.config['groupe_reference'], self.config['x_reference']
+        if (groupe is None) == (val_x is None):
+            raise ValueError(f"La normalisation '{mode}' exige soit groupe_reference, "
+                             f"soit x_reference")
+        axe, labels, cible = ('groupe', self.groupes, groupe) if groupe is not None \
+            else ('x', self.valeurs_x, val_x)
+        textes = [str(label) for label in labels]
+        if str(cible) not in textes:
+            raise ValueError(f"Référence '{cible}' introuvable. Disponibles : {textes}")
+        return axe, textes.index(str(cible))
+    
+    def _regrouper(self):
+        """
+        Regroupement hiérarchique demandé par la configuration, sur les valeurs transformées
         
-        # Créer heatmap
-        im = ax.imshow(matrice_plot, cmap=cmap, aspect='auto')
+        Les liaisons des lignes (puis des groupes) de toutes les heatmaps sont
+        calculées en un lot sur self.tenseur_plot ; celle des marqueurs fixe
+        self.ordre_marqueurs. Sans regroupement, l'ordre du fichier est conservé.
+        """
+        methode = self.config['methode_clustering']
+        metrique = self.config['metrique_clustering']
+        aucune = [None] * len(self.marqueurs)
+        liaisons_lignes = (calculer_liaisons(self.tenseur_plot, methode, metrique)
+                           if self.config['clustering_lignes'] else aucune)
+        liaisons_groupes = (calculer_liaisons(self.tenseur_plot.transpose(0, 2, 1), methode, metrique)
+                            if self.config['clustering_groupes'] else aucune)
+        self.liaisons = dict(zip(self.marqueurs, zip(liaisons_lignes, liaisons_groupes)))
         
-        # Configurer axes
-        ax.set_xticks(np.arange(len(self.groupes)))
-        ax.set_yticks(np.arange(len(self.valeurs_x)))
-        ax.set_xticklabels(self.groupes, fontsize=9)
-        ax.set_yticklabels(self.valeurs_x, fontsize=9)
+        self.liaison_marqueurs = None
+        self.ordre_marqueurs = list(self.marqueurs)
+        if self.config['clustering_marqueurs'] and len(self.marqueurs) > 1:
+            self.liaison_marqueurs = calculer_liaisons(
+                self.tenseur_plot.reshape(1, len(self.marqueurs), -1), methode, metrique)[0]
+            self.ordre_marqueurs = [self.marqueurs[k] for k in leaves_list(self.liaison_marqueurs)]
+    
+    def _marqueurs_ordonnes(self):
+        # Ordre du regroupement si l'étape de transformation est à jour, sinon celui du fichier
+        if 'transformation' in self._etapes_valides:
+            return self.ordre_marqueurs
+        return self.marqueurs
+    
+    def _donnees_heatmap(self, marqueur):
+        """
+        Données de rendu d'un marqueur, dans l'ordre du regroupement hiérarchique
         
-        # Labels des axes
-        label_x = self.config['label_axe_x'] if self.config['label_axe_x'] else self.nom_colonne_x
-        ax.set_xlabel(label_x, fontsize=10, fontweight='bold')
+        Retourne:
+            tuple: (matrice, valeurs_x, groupes, matrice_plot, dendrogrammes) ;
+                   ordre du fichier si la transformation n'est pas à jour,
+                   dendrogrammes None s'ils ne sont pas demandés
+        """
+        matrice_plot = self._matrice_plot(marqueur)
+        matrice, valeurs_x, groupes = self.matrices[marqueur], self.valeurs_x, self.groupes
+        if 'transformation' not in self._etapes_valides:
+            return matrice, valeurs_x, groupes, matrice_plot, None
         
-        # Rotation des labels X si nécessaire
-        plt.setp(ax.get_xticklabels(), rotation=45, ha="right", rotation_mode="anchor")
+        liaison_lignes, liaison_groupes = self.liaisons.get(marqueur, (None, None))
+        if liaison_lignes is not None:
+            ordre = leaves_list(liaison_lignes)
+            matrice, matrice_plot = matrice[ordre], matrice_plot[ordre]
+            valeurs_x = [valeurs_x[i] for i in ordre]
+        if liaison_groupes is not None:
+            ordre = leaves_list(liaison_groupes)
+            matrice, matrice_plot = matrice[:, ordre], matrice_plot[:, ordre]
+            groupes = [groupes[j] for j in ordre]
         
-        # Afficher valeurs si demandé
-        if afficher_valeurs:
-            for i in range(len(self.valeurs_x)):
-                for j in range(len(self.groupes)):
-                    val = matrice[i, j]
-                    # Format adaptatif
-                    if val < 1:
-                        text = f'{val:.2f}'
-                    elif val < 10:
-                        text = f'{val:.1f}'
-                    else:
-                        text = f'{val:.0f}'
-                    
-                    # Couleur du texte selon fond
-                    if matrice_plot[i, j] > (matrice_plot.max() * 0.6):
-                        color = 'white'
-                    else:
-                        color = 'black'
-                    
-                    ax.text(j, i, text, ha="center", va="center",
-                           color=color, fontsize=8)
+        dendrogrammes = None
+        if self.config['dendrogrammes'] and (liaison_lignes is not None or liaison_groupes is not None):
+            dendrogrammes = (liaison_lignes, liaison_groupes)
+        return matrice, valeurs_x, groupes, matrice_plot, dendrogrammes
+    
+    @_etape_mesuree('rendu')
+    def rendre_heatmaps(self):
+        """
+        Rend toutes les heatmaps et conserve les PNG dans self.images
+        """
+        if 'transformation' not in self._etapes_valides:
+            self.transformer_matrices()
+        self.images = {marqueur: buffer.getvalue() for marqueur, buffer in
+                       zip(self.marqueurs, self._iterer_heatmaps(self.marqueurs,
+                                                                  self.config['afficher_valeurs'],
+                                                                  self.config['palette']))}
+        self._valider_etape('rendu')
+    
+    def _label_x(self):
+        """
+        Label de l'axe X : label personnalisé ou nom de la colonne X
+        """
+        return self.config['label_axe_x'] if self.config['label_axe_x'] else self.nom_colonne_x
+    
+    def _matrice_plot(self, marqueur):
+        # Valeurs transformées si l'étape de transformation est à jour ; sinon
+        # transformation par défaut de la statistique des couleurs
+        # (self.matrices porte celle des valeurs affichées)
+        if 'transformation' in self._etapes_valides:
+            return self.matrices_plot[marqueur]
+        self._selectionner_statistiques()
+        return transformer_valeurs(self.couleurs[marqueur], self.config)
+    
+    def creer_heatmap(self, marqueur, afficher_valeurs=None, palette=None):
+        """
+        Crée une heatmap pour un marqueur donné
         
-        # Titre
-        ax.set_title(marqueur, fontsize=12, fontweight='bold', pad=10)
+        afficher_valeurs et palette valent par défaut les valeurs de la configuration.
+        """
+        if afficher_valeurs is None:
+            afficher_valeurs = self.config['afficher_valeurs']
+        if palette is None:
+            palette = self.config['palette']
+        if 'transformation' not in self._etapes_valides:
+            self.transformer_matrices()
+        matrice, valeurs_x, groupes, matrice_plot, dendrogrammes = self._donnees_heatmap(marqueur)
+        png = rendre_heatmap(matrice, marqueur, valeurs_x, groupes, self._label_x(), self.config,
+                             afficher_valeurs, palette, matrice_plot, dendrogrammes)
+        return BytesIO(png)
+    
+    def _obtenir_cache_images(self):
+        """
+        Retourne le cache disque des images (None si config['cache_images'] est vide)
+        """
+        dossier = self.config['cache_images']
+        if not dossier:
+            return None
+        if self.cache_images is None or self.cache_images.dossier != dossier:
+            self.cache_images = CacheImages(dossier, self.config['cache_images_taille_max'])
+        return self.cache_images
+    
+    def _rendre_taches(self, taches, executer=_rendre_heatmap_tache):
+        """
+        Rend une liste de tâches de rendu (PNG bytes), dans l'ordre
         
-        # Colorbar
-        cbar = plt.colorbar(im, ax=ax, fraction=0.046, pad=0.04)
-        if self.config['echelle_log']:
-            cbar.set_label('log₁₀(valeur + 1)', rotation=270, labelpad=15, fontsize=8)
-        else:
-            cbar.set_label('Valeur', rotation=270, labelpad=15, fontsize=8)
+        Avec config['processus_rendu'] > 1 (ou None = tous les cœurs), le rendu
+        est réparti sur un ProcessPoolExecutor ; les images sont identiques à
+        celles du rendu séquentiel. Les lots sont soumis au fil de la
+        consommation (au plus deux par processus en attente), de sorte que les
+        images rendues ne s'accumulent pas en mémoire. executer est la
+        fonction (picklable) appliquée à chaque tâche.
+        """
+        n_processus = self.config['processus_rendu']
+        if n_processus is None:
+            n_processus = os.cpu_count() or 1
+        n_processus = min(n_processus, len(taches))
         
-        plt.tight_layout()
+        if n_processus <= 1:
+            for tache in taches:
+                yield executer(tache)
+            return
         
-        # Sauvegarder en mémoire
-        buffer = BytesIO()
-        plt.savefig(buffer, format='png', bbox_inches='tight', dpi=self.config['dpi'])
-        buffer.seek(0)
-        plt.close()
+        taille_lot = max(1, min(len(taches) // (n_processus * 4), 4))
+        lots = (taches[i:i + taille_lot] for i in range(0, len(taches), taille_lot))
+        executor = ProcessPoolExecutor(max_workers=n_processus)
+        try:
+            en_cours = deque()
+            for lot in lots:
+                en_cours.append(executor.submit(_executer_lot, executer, lot))
+                if len(en_cours) == 2 * n_processus:
+                    break
+            while en_cours:
+                pngs = en_cours.popleft().result()
+                lot = next(lots, None)
+                if lot is not None:
+                    en_cours.append(executor.submit(_executer_lot, executer, lot))
+                yield from pngs
+        finally:
+            # Itération interrompue (annulation) : les lots non démarrés sont abandonnés
+            executor.shutdown(cancel_futures=True)
+    
+    def _iterer_heatmaps(self, marqueurs, afficher_valeurs, palette):
+        """
+        Génère les images PNG des marqueurs, dans l'ordre demandé
         
-        return buffer
+        Si config['cache_images'] est défini, les images déjà rendues avec les
+        mêmes données et réglages sont lues depuis le cache disque ; seules
+        les autres sont rendues, puis ajoutées au cache. La progression est
+        signalée après chaque image.
+        """
+        label_x = self._label_x()
+        taches = []
+        for m in marqueurs:
+            matrice, valeurs_x, groupes, matrice_plot, dendrogrammes = self._donnees_heatmap(m)
+            taches.append((matrice, m, valeurs_x, groupes, label_x, self.config, afficher_valeurs,
+                           palette, matrice_plot, dendrogrammes))
+        return self._iterer_rendus(taches, CacheImages.cle, _rendre_heatmap_tache, [1] * len(taches))
     
-    def creer_presentation(self, fichier_sortie, afficher_valeurs=True, palette='rouge'):
+    def _iterer_planches(self, lots, afficher_valeurs, palette, disposition):
         """
-        Crée une présentation PowerPoint complète
+        Génère une image PNG par slide (planche composite), dans l'ordre des lots
+        
+        Même cache disque et même parallélisme que _iterer_heatmaps ; la
+        progression est comptée en marqueurs.
+        """
+        label_x = self._label_x()
+        taches = []
+        for lot in lots:
+            matrices, valeurs_x, groupes, matrices_plot, dendrogrammes = zip(
+                *(self._donnees_heatmap(m) for m in lot))
+            taches.append((list(matrices), list(lot), self.valeurs_x, self.groupes, label_x,
+                           self.config, afficher_valeurs, palette, list(matrices_plot), disposition,
+                           self.config['echelle_commune'], list(zip(valeurs_x, groupes)),
+                           list(dendrogrammes)))
+        return self._iterer_rendus(taches, CacheImages.cle_planche, _rendre_planche_tache,
+                                   [len(lot) for lot in lots])
+    
+    def _iterer_rendus(self, taches, calculer_cle, executer, effectifs):
+        # Rendu des tâches dans l'ordre, via le cache disque s'il est activé ;
+        # effectifs = nombre de marqueurs de chaque tâche (progression)
+        n_marqueurs = sum(effectifs)
+        faits = np.cumsum(effectifs)
+        
+        cache = self._obtenir_cache_images()
+        if cache is None:
+            self.instrumentation.compter('heatmaps_rendues', len(taches))
+            for k, png in enumerate(self._rendre_taches(taches, executer)):
+                self._signaler('rendu', int(faits[k]), n_marqueurs)
+                yield BytesIO(png)
+            return
+        
+        cles = [calculer_cle(*tache) for tache in taches]
+        a_rendre = [k for k, cle in enumerate(cles) if not cache.contient(cle)]
+        rendus = self._rendre_taches([taches[k] for k in a_rendre], executer)
+        self.instrumentation.compter('heatmaps_rendues', len(a_rendre))
+        self.instrumentation.compter('cache_images.succes', len(taches) - len(a_rendre))
+        a_rendre = set(a_rendre)
+        
+        for k, cle in enumerate(cles):
+            png = None if k in a_rendre else cache.lire(cle)
+            if png is None:
+                # Image absente, ou évincée entre-temps par un autre processus
+                png = next(rendus) if k in a_rendre else executer(taches[k])
+                cache.ecrire(cle, png)
+            self._signaler('rendu', int(faits[k]), n_marqueurs)
+            yield BytesIO(png)
+    
+    def _decoupage(self):
+        # Mode découpé : plusieurs présentations réunies dans une archive ZIP
+        return bool(self.config['marqueurs_par_fichier'] or self.config['octets_par_fichier'])
+    
+    def _verifier_sortie(self, fichier_sortie):
+        # Mode découpé : un chemin de sortie doit porter l'extension de l'archive
+        if self._decoupage() and isinstance(fichier_sortie, (str, os.PathLike)) \
+                and os.path.splitext(os.fspath(fichier_sortie))[1].lower() != '.zip':
+            raise ValueError(f"Présentation découpée (marqueurs_par_fichier / octets_par_fichier) : "
+                             f"la sortie est une archive ZIP, '{os.fspath(fichier_sortie)}' "
+                             f"doit se terminer par .zip")
+    
+    def _nouvelle_presentation(self, partie=None):
         """
-        print("\n" + "=" * 80)
-        print("CRÉATION DE LA PRÉSENTATION")
-        print("=" * 80 + "\n")
+        Crée une présentation vide et sa page de titre
         
+        Paramètres:
+            partie (int): Numéro de la partie en mode découpé (None sinon)
+        """
         prs = Presentation()
         prs.slide_width = Inches(10)
         prs.slide_height = Inches(7.5)
@@ -346,7 +2613,8 @@ class HeatmapGenerator:
         top = Inches(3.5)
         txBox = slide.shapes.add_textbox(left, top, width, height)
         tf = txBox.text_frame
-        tf.text = self.config['sous_titre']
+        tf.text = self.config['sous_titre'] if partie is None else \
+            f"{self.config['sous_titre']} (partie {partie})"
         p = tf.paragraphs[0]
         p.font.size = Inches(0.25)
         
@@ -356,81 +2624,467 @@ class HeatmapGenerator:
         txBox = slide.shapes.add_textbox(left, top, width, height)
         tf = txBox.text_frame
         
-        label_x = self.config['label_axe_x'] if self.config['label_axe_x'] else self.nom_colonne_x
+        label_x = self._label_x()
         
         info_text = f"""• {len(self.marqueurs)} marqueurs analysés
 • {len(self.valeurs_x)} valeurs de {label_x}
 • {len(self.groupes)} groupes de traitement"""
         
-        if self.config['echelle_log']:
+        if self.config['statistique'] != 'moyenne':
+            info_text += f"\n• Couleurs : {self.config['statistique']} des réplicats"
+        if self.config['statistique_valeurs'] not in (None, self.config['statistique']):
+            info_text += f"\n• Valeurs affichées : {self.config['statistique_valeurs']} des réplicats"
+        if self.config['normalisation']:
+            info_text += f"\n• Normalisation : {libelle_echelle(self.config)}"
+        elif self.config['echelle_log']:
             info_text += "\n• Échelle logarithmique appliquée"
         
         tf.text = info_text
         p = tf.paragraphs[0]
         p.font.size = Inches(0.18)
+        return prs
+    
+    @_etape_mesuree('assemblage')
+    def creer_presentation(self, fichier_sortie=None, afficher_valeurs=None, palette=None):
+        """
+        Crée une présentation PowerPoint complète
         
-        print("✓ Slide 1 : Page de titre")
+        afficher_valeurs et palette valent par défaut les valeurs de la
+        configuration ; s'ils sont fournis, la configuration est mise à jour.
+        Les images déjà rendues par generer() sont réutilisées si elles sont à jour.
         
-        # Slides suivantes: Heatmaps
-        max_par_slide = self.config['max_heatmaps_par_slide']
+        Si config['marqueurs_par_fichier'] et/ou config['octets_par_fichier']
+        sont définis, la présentation est découpée en plusieurs .pptx (chacun
+        avec sa page de titre, slides de heatmaps entières) écrits l'un après
+        l'autre dans une archive ZIP : une seule partie est en mémoire à la
+        fois. Le plafond d'octets porte sur les images incorporées ; une
+        partie peut le dépasser d'au plus une slide. Un chemin de sortie doit
+        alors se terminer par .zip ; en cas d'échec ou d'annulation, l'archive
+        partielle est supprimée.
         
-        # Calculer disposition
-        if max_par_slide <= 4:
-            cols, rows = 2, 2
-        elif max_par_slide <= 6:
-            cols, rows = 3, 2
-        else:
-            cols, rows = 3, 3
+        Paramètres:
+            fichier_sortie: Chemin, objet fichier binaire ouvert en écriture
+                            (BytesIO, réponse HTTP...), ou None
+        
+        Retourne:
+            bytes: Contenu du fichier .pptx (ou de l'archive .zip en mode
+                   découpé) si fichier_sortie est None (aucune écriture sur
+                   disque), sinon None
+        """
+        modifications = {cle: valeur for cle, valeur in
+                         (('afficher_valeurs', afficher_valeurs), ('palette', palette))
+                         if valeur is not None}
+        if modifications:
+            self.modifier_config(**modifications)
+        afficher_valeurs = self.config['afficher_valeurs']
+        palette = self.config['palette']
+        self._verifier_sortie(fichier_sortie)
+        if 'transformation' not in self._etapes_valides:
+            self.transformer_matrices()
         
-        heatmap_width = 9 / cols
-        heatmap_height = 6 / rows
+        self._afficher("\n" + "=" * 80)
+        self._afficher("CRÉATION DE LA PRÉSENTATION")
+        self._afficher("=" * 80 + "\n")
         
-        # Générer heatmaps
-        num_slides_data = 0
-        for i in range(0, len(self.marqueurs), max_par_slide):
-            batch = self.marqueurs[i:i + max_par_slide]
+        # Sortie (chemin, flux fourni, ou tampon mémoire retourné)
+        en_memoire = fichier_sortie is None
+        if en_memoire:
+            fichier_sortie = BytesIO()
+        est_chemin = isinstance(fichier_sortie, (str, os.PathLike))
+        try:
+            position = None if est_chemin else fichier_sortie.tell()
+        except (AttributeError, OSError):
+            position = None  # Flux non positionnable : taille écrite inconnue
+        
+        # Mode découpé : parties écrites au fil de l'eau dans l'archive
+        archive = None
+        if self._decoupage():
+            nom = os.fspath(fichier_sortie) if est_chemin else getattr(fichier_sortie, 'name', None)
+            racine = os.path.splitext(os.path.basename(nom))[0] if isinstance(nom, str) else 'Heatmaps'
+            archive = zipfile.ZipFile(fichier_sortie, 'w', zipfile.ZIP_STORED)
+            # Images d'un rendu complet antérieur libérées : chaque partie est
+            # rendue au fil de l'assemblage
+            self.images = {}
+            self._etapes_valides.discard('rendu')
+        max_marqueurs = self.config['marqueurs_par_fichier']
+        max_octets = self.config['octets_par_fichier']
+        parties = []  # (nom, nombre de slides) des parties écrites
+        
+        def enregistrer_partie(prs, n_slides):
+            # Écrit la partie dans l'archive ; l'appelant abandonne ensuite prs
+            nom_partie = f"{racine}_partie_{len(parties) + 1:03d}.pptx"
+            with archive.open(nom_partie, 'w', force_zip64=True) as flux:
+                prs.save(flux)
+            parties.append((nom_partie, n_slides))
+            self._afficher(f"✓ Partie {len(parties)} : {n_slides} slides → {nom_partie}")
+        
+        try:
+            prs = self._nouvelle_presentation(1 if archive is not None else None)
+            slides_partie = 1
+            marqueurs_partie = octets_partie = 0
+        
+            self._afficher("✓ Slide 1 : Page de titre")
+        
+            label_x = self._label_x()
+        
+            # Marqueurs dans l'ordre du regroupement hiérarchique (ordre du fichier sinon)
+            marqueurs = self._marqueurs_ordonnes()
+            num_slides_data = 0
+        
+            # Slide de synthèse : dendrogramme des marqueurs
+            if self.config['dendrogrammes'] and self.liaison_marqueurs is not None \
+                    and 'transformation' in self._etapes_valides:
+                slide = prs.slides.add_slide(prs.slide_layouts[6])
+                png = dessiner_dendrogramme_marqueurs(self.liaison_marqueurs, self.marqueurs, self.config)
+                slide.shapes.add_picture(BytesIO(png), Inches(0.5), Inches(0.75),
+                                         width=Inches(9), height=Inches(6))
+                octets_partie += len(png)
+                del png
+                num_slides_data += 1
+                slides_partie += 1
+                self._afficher("✓ Slide 2 : Dendrogramme des marqueurs")
+            premiere_slide_heatmaps = num_slides_data + 2
+        
+            # Slides suivantes: Heatmaps
+            max_par_slide = self.config['max_heatmaps_par_slide']
+        
+            # Calculer disposition
+            if max_par_slide <= 4:
+                cols, rows = 2, 2
+            elif max_par_slide <= 6:
+                cols, rows = 3, 2
+            else:
+                cols, rows = 3, 3
+        
+            heatmap_width = 9 / cols
+            heatmap_height = 6 / rows
+        
+            # Générer heatmaps (images PNG, une planche par slide, ou formes natives)
+            natives = self.config['heatmaps_natives']
+            planches = None
+            if natives:
+                images = None
+            elif self.config['planches_composites']:
+                lots = [marqueurs[i:i + max_par_slide] for i in range(0, len(marqueurs), max_par_slide)]
+                planches = self._iterer_planches(lots, afficher_valeurs, palette, (cols, rows))
+            elif 'rendu' in self._etapes_valides:
+                images = (BytesIO(self.images[marqueur]) for marqueur in marqueurs)
+            else:
+                images = self._iterer_heatmaps(marqueurs, afficher_valeurs, palette)
+            for i in range(0, len(marqueurs), max_par_slide):
+                batch = marqueurs[i:i + max_par_slide]
+            
+                # Partie pleine : écrite dans l'archive, puis libérée avant la suivante
+                # (le graphe d'objets python-pptx est cyclique : sans collecte
+                # explicite, les images des parties écrites restent en mémoire)
+                if archive is not None and marqueurs_partie and (
+                        (max_marqueurs and marqueurs_partie + len(batch) > max_marqueurs)
+                        or (max_octets and octets_partie >= max_octets)):
+                    enregistrer_partie(prs, slides_partie)
+                    prs = None
+                    gc.collect()
+                    prs = self._nouvelle_presentation(len(parties) + 1)
+                    slides_partie = 1
+                    marqueurs_partie = octets_partie = 0
             
-            slide = prs.slides.add_slide(prs.slide_layouts[6])
+                slide = prs.slides.add_slide(prs.slide_layouts[6])
             
-            # Titre du slide
-            txBox = slide.shapes.add_textbox(Inches(0.5), Inches(0.3), Inches(9), Inches(0.5))
-            tf = txBox.text_frame
-            tf.text = f"Heatmaps - Marqueurs {i+1} à {min(i+max_par_slide, len(self.marqueurs))}"
-            p = tf.paragraphs[0]
-            p.font.size = Inches(0.25)
-            p.font.bold = True
+                # Titre du slide
+                txBox = slide.shapes.add_textbox(Inches(0.5), Inches(0.3), Inches(9), Inches(0.5))
+                tf = txBox.text_frame
+                tf.text = f"Heatmaps - Marqueurs {i+1} à {min(i+max_par_slide, len(self.marqueurs))}"
+                p = tf.paragraphs[0]
+                p.font.size = Inches(0.25)
+                p.font.bold = True
             
-            # Ajouter heatmaps
-            for j, marqueur in enumerate(batch):
-                row = j // cols
-                col = j % cols
+                num_slides_data += 1
+                slides_partie += 1
+                marqueurs_partie += len(batch)
+            
+                if planches is not None:
+                    # Une seule image couvrant toute la zone des heatmaps
+                    img_buffer = next(planches)
+                    slide.shapes.add_picture(img_buffer, Inches(0.5), Inches(1),
+                                             width=Inches(9), height=Inches(6))
+                    octets_partie += img_buffer.getbuffer().nbytes
+                    img_buffer.close()  # Copie incorporée à la partie : tampon libéré
+                    continue
+            
+                # Ajouter heatmaps
+                for j, marqueur in enumerate(batch):
+                    row = j // cols
+                    col = j % cols
                 
-                left = Inches(0.5 + col * heatmap_width)
-                top = Inches(1 + row * heatmap_height)
+                    left = Inches(0.5 + col * heatmap_width)
+                    top = Inches(1 + row * heatmap_height)
                 
-                img_buffer = self.creer_heatmap(marqueur, afficher_valeurs, palette)
-                slide.shapes.add_picture(img_buffer, left, top,
-                                        width=Inches(heatmap_width * 0.9),
-                                        height=Inches(heatmap_height * 0.85))
-            
-            num_slides_data += 1
+                    if natives:
+                        # Formes natives : ordre du regroupement, sans dendrogrammes
+                        matrice, valeurs_x, groupes, matrice_plot, _ = self._donnees_heatmap(marqueur)
+                        dessiner_heatmap_pptx(slide, left, top, Inches(heatmap_width * 0.9),
+                                              Inches(heatmap_height * 0.85), matrice, marqueur,
+                                              valeurs_x, groupes, label_x, self.config,
+                                              afficher_valeurs, palette, matrice_plot)
+                        self._signaler('rendu', i + j + 1, len(self.marqueurs))
+                        continue
+                
+                    img_buffer = next(images)
+                    slide.shapes.add_picture(img_buffer, left, top,
+                                            width=Inches(heatmap_width * 0.9),
+                                            height=Inches(heatmap_height * 0.85))
+                    octets_partie += img_buffer.getbuffer().nbytes
+                    img_buffer.close()
         
-        print(f"✓ Slide 2-{num_slides_data+1} : {len(self.marqueurs)} heatmaps ({', '.join(self.marqueurs)})")
+            # Dernier point d'annulation : une fois la présentation écrite, elle est acquise
+            num_slides = num_slides_data + 1 if archive is None \
+                else sum(n for _, n in parties) + slides_partie
+            self._signaler('assemblage', 0, num_slides)
         
-        # Sauvegarder
-        prs.save(fichier_sortie)
+            if archive is None:
+                self._afficher(f"✓ Slide {premiere_slide_heatmaps}-{num_slides_data+1} : {len(marqueurs)} heatmaps ({', '.join(marqueurs)})")
+                prs.save(fichier_sortie)
+            else:
+                enregistrer_partie(prs, slides_partie)
+                archive.close()
+                self.instrumentation.compter('parties', len(parties))
+            prs = None
+        except BaseException:
+            # Échec ou annulation en mode découpé : archive fermée, fichier partiel supprimé
+            if archive is not None:
+                archive.close()
+                if est_chemin:
+                    with contextlib.suppress(OSError):
+                        os.remove(fichier_sortie)
+            raise
         
-        print("\n" + "=" * 80)
-        print(f"PRÉSENTATION CRÉÉE : {fichier_sortie}")
-        print("=" * 80 + "\n")
-        print(f"  - {num_slides_data + 1} slides générées")
-        print(f"  - {len(self.marqueurs)} heatmaps au total")
-        print(f"  - Palette : {palette}")
-        print(f"  - Valeurs : {'affichées' if afficher_valeurs else 'masquées'}")
-        print()
+        self.instrumentation.compter('slides', num_slides)
+        if est_chemin:
+            self.instrumentation.compter('octets_ecrits', os.path.getsize(fichier_sortie))
+        elif position is not None:
+            self.instrumentation.compter('octets_ecrits', fichier_sortie.tell() - position)
+        self._signaler('assemblage', num_slides, num_slides, annulable=False)
+        
+        if est_chemin:
+            destination = os.fspath(fichier_sortie)
+        else:
+            destination = "en mémoire" if en_memoire else getattr(fichier_sortie, 'name', "flux")
+        self._afficher("\n" + "=" * 80)
+        self._afficher(f"PRÉSENTATION CRÉÉE : {destination}")
+        self._afficher("=" * 80 + "\n")
+        if archive is not None:
+            self._afficher(f"  - {len(parties)} parties (archive ZIP)")
+        self._afficher(f"  - {num_slides} slides générées")
+        self._afficher(f"  - {len(self.marqueurs)} heatmaps au total")
+        self._afficher(f"  - Palette : {palette}")
+        self._afficher(f"  - Valeurs : {'affichées' if afficher_valeurs else 'masquées'}")
+        if self.cache_images is not None:
+            stats = self.cache_images.statistiques()
+            self._afficher(f"  - Cache images : {stats['succes']} réutilisées, {stats['echecs']} rendues")
+        self._afficher()
+        
+        return fichier_sortie.getvalue() if en_memoire else None
+
+
+def _lister_entrees(motifs):
+    """
+    Développe fichiers, motifs glob et dossiers en une liste de fichiers de données
+    
+    Retourne:
+        tuple: (fichiers trouvés, motifs sans correspondance)
+    """
+    fichiers, introuvables = [], []
+    for motif in motifs:
+        if os.path.isdir(motif):
+            trouves = sorted(os.path.join(motif, nom) for nom in os.listdir(motif)
+                             if os.path.splitext(nom.lower())[1] in FORMATS_EXTENSIONS
+                             and not nom.startswith('~$'))
+        elif os.path.isfile(motif):
+            trouves = [motif]
+        else:
+            trouves = sorted(glob.glob(motif, recursive=True))
+        if not trouves:
+            introuvables.append(motif)
+        for fichier in trouves:
+            if fichier not in fichiers:
+                fichiers.append(fichier)
+    return fichiers, introuvables
+
+
+def _nommer_sorties(fichiers, dossier_sortie, extension_sortie='.pptx'):
+    """
+    Associe à chaque fichier d'entrée un chemin de présentation unique
+    (extension_sortie = '.zip' pour les présentations découpées)
+    """
+    sorties, pris = [], set()
+    for fichier in fichiers:
+        racine, extension = os.path.splitext(os.path.basename(fichier))
+        base = nom = f"Heatmaps_{racine}"
+        if nom in pris:
+            base = nom = f"{base}_{extension.lstrip('.')}"
+        n = 1
+        while nom in pris:
+            n += 1
+            nom = f"{base}_{n}"
+        pris.add(nom)
+        sorties.append(os.path.join(dossier_sortie, nom + extension_sortie))
+    return sorties
+
+
+def _traiter_fichier(tache):
+    """
+    Génère la présentation d'un fichier (exécuté dans un processus du pool)
+    
+    Retourne:
+        dict: fichier, sortie, statut ('ok' / 'échec'), durée, marqueurs, message
+    """
+    fichier, sortie, config, verbeux = tache
+    debut = time.perf_counter()
+    resultat = {'fichier': fichier, 'sortie': sortie, 'marqueurs': 0, 'message': ''}
+    try:
+        generator = HeatmapGenerator(fichier, dict(config, verbeux=verbeux))
+        generator.generer(sortie)
+        resultat.update(statut='ok', marqueurs=len(generator.marqueurs))
+    except Exception as e:
+        resultat.update(statut='échec', message=f"{type(e).__name__}: {e}")
+    resultat['duree'] = time.perf_counter() - debut
+    return resultat
+
+
+def _entier_positif(texte):
+    # Type argparse : entier strictement positif
+    try:
+        valeur = int(texte)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"entier attendu : '{texte}'")
+    if valeur < 1:
+        raise argparse.ArgumentTypeError(f"entier positif attendu : {valeur}")
+    return valeur
+
+
+def main(argv=None):
+    """
+    Point d'entrée en ligne de commande : une présentation par fichier d'entrée
+    
+    Retourne:
+        int: Code de sortie (0 si tous les fichiers ont été traités, 1 sinon)
+    """
+    parser = argparse.ArgumentParser(
+        description="Génère une présentation de heatmaps par fichier de données "
+                    "(fichiers, motifs glob ou dossiers)")
+    parser.add_argument('entrees', nargs='+', help="Fichiers, motifs (ex: 'exports/*.xlsx') ou dossiers")
+    parser.add_argument('-o', '--sortie', default='.', help="Dossier des présentations (défaut : .)")
+    parser.add_argument('-j', '--processus', type=_entier_positif, default=os.cpu_count() or 1,
+                        help="Nombre de fichiers traités en parallèle (défaut : nombre de cœurs)")
+    parser.add_argument('--palette', default='rouge', choices=palettes_disponibles())
+    parser.add_argument('--sans-valeurs', action='store_true', help="Masquer les valeurs dans les cellules")
+    parser.add_argument('--lineaire', action='store_true', help="Désactiver l'échelle logarithmique")
+    parser.add_argument('--statistique', default='moyenne', choices=STATISTIQUES,
+                        help="Statistique des réplicats représentée par les couleurs")
+    parser.add_argument('--statistique-valeurs', default=None, choices=STATISTIQUES,
+                        help="Statistique écrite dans les cellules (défaut : la même)")
+    parser.add_argument('--colonne-x', default=None, help="Nom de la colonne X (défaut : première colonne)")
+    parser.add_argument('--label-x', default=None, help="Label de l'axe X")
+    parser.add_argument('--max-par-slide', type=_entier_positif, default=6,
+                        choices=range(1, MAX_HEATMAPS_PAR_SLIDE + 1), metavar='N',
+                        help=f"Heatmaps par slide (1 à {MAX_HEATMAPS_PAR_SLIDE})")
+    parser.add_argument('--titre', default=None, help="Titre de la présentation")
+    parser.add_argument('--dpi', type=int, default=150)
+    parser.add_argument('--moteur', default='matplotlib', choices=list(MOTEURS_RENDU),
+                        help="Moteur de rendu des heatmaps")
+    parser.add_argument('--natives', action='store_true',
+                        help="Heatmaps en tableaux PowerPoint modifiables (sans images)")
+    parser.add_argument('--planches', action='store_true',
+                        help="Une seule figure par slide (rendu groupé des heatmaps)")
+    parser.add_argument('--echelle-commune', action='store_true',
+                        help="Avec --planches : même échelle de couleurs et une seule colorbar par slide")
+    parser.add_argument('--normalisation', default=None, choices=list(NORMALISATIONS),
+                        help="Normalisation par marqueur des couleurs (remplace l'échelle log)")
+    parser.add_argument('--groupe-reference', default=None, help="Fold change : groupe de référence")
+    parser.add_argument('--x-reference', default=None, help="Fold change : valeur X de référence")
+    parser.add_argument('--clustering', nargs='+', default=[], choices=['lignes', 'groupes', 'marqueurs'],
+                        help="Regroupement hiérarchique des valeurs X, des groupes et/ou des marqueurs")
+    parser.add_argument('--methode-clustering', default='average', choices=METHODES_CLUSTERING)
+    parser.add_argument('--metrique-clustering', default='euclidean', choices=METRIQUES_CLUSTERING)
+    parser.add_argument('--dendrogrammes', action='store_true',
+                        help="Avec --clustering : dessiner les dendrogrammes")
+    parser.add_argument('--marqueurs-par-fichier', type=_entier_positif, default=None,
+                        help="Découper chaque présentation en parties de N marqueurs au plus (archive .zip)")
+    parser.add_argument('--mo-par-fichier', type=float, default=None,
+                        help="Découper chaque présentation en parties d'environ N Mo d'images (archive .zip)")
+    parser.add_argument('--cache-images', default=None, help="Dossier du cache disque des images")
+    parser.add_argument('--blocs', type=int, default=None,
+                        help="Lire les CSV par blocs de N lignes")
+    parser.add_argument('-v', '--verbeux', action='store_true', help="Afficher le détail de chaque fichier")
+    args = parser.parse_args(argv)
+    
+    fichiers, introuvables = _lister_entrees(args.entrees)
+    for motif in introuvables:
+        print(f"✗ Aucun fichier pour : {motif}", file=sys.stderr)
+    if not fichiers:
+        return 1
+    
+    config = {
+        'colonne_x': args.colonne_x,
+        'label_axe_x': args.label_x,
+        'echelle_log': not args.lineaire,
+        'statistique': args.statistique,
+        'statistique_valeurs': args.statistique_valeurs,
+        'normalisation': args.normalisation,
+        'groupe_reference': args.groupe_reference,
+        'x_reference': args.x_reference,
+        'palette': args.palette,
+        'afficher_valeurs': not args.sans_valeurs,
+        'dpi': args.dpi,
+        'max_heatmaps_par_slide': args.max_par_slide,
+        'moteur_rendu': args.moteur,
+        'heatmaps_natives': args.natives,
+        'planches_composites': args.planches,
+        'echelle_commune': args.echelle_commune,
+        'marqueurs_par_fichier': args.marqueurs_par_fichier,
+        'octets_par_fichier': int(args.mo_par_fichier * 1024 ** 2) if args.mo_par_fichier else None,
+        'cache_images': args.cache_images,
+        'lecture_par_blocs': args.blocs,
+        'clustering_lignes': 'lignes' in args.clustering,
+        'clustering_groupes': 'groupes' in args.clustering,
+        'clustering_marqueurs': 'marqueurs' in args.clustering,
+        'methode_clustering': args.methode_clustering,
+        'metrique_clustering': args.metrique_clustering,
+        'dendrogrammes': args.dendrogrammes,
+        'processus_rendu': 1,  # le parallélisme se fait entre fichiers
+    }
+    if args.titre:
+        config['titre_presentation'] = args.titre
+    
+    os.makedirs(args.sortie, exist_ok=True)
+    extension_sortie = '.zip' if args.marqueurs_par_fichier or args.mo_par_fichier else '.pptx'
+    taches = [(fichier, sortie, config, args.verbeux) for fichier, sortie in
+              zip(fichiers, _nommer_sorties(fichiers, args.sortie, extension_sortie))]
+    
+    n_processus = max(1, min(args.processus, len(taches)))
+    print(f"Traitement de {len(taches)} fichier(s) avec {n_processus} processus\n")
+    debut = time.perf_counter()
+    resultats = []
+    
+    def afficher(resultat):
+        symbole = '✓' if resultat['statut'] == 'ok' else '✗'
+        detail = (f"{resultat['marqueurs']} marqueurs → {resultat['sortie']}"
+                  if resultat['statut'] == 'ok' else resultat['message'])
+        print(f"{symbole} {resultat['duree']:7.2f} s  {resultat['fichier']} : {detail}")
+        resultats.append(resultat)
+    
+    if n_processus == 1:
+        for tache in taches:
+            afficher(_traiter_fichier(tache))
+    else:
+        with ProcessPoolExecutor(max_workers=n_processus) as executor:
+            for future in as_completed([executor.submit(_traiter_fichier, t) for t in taches]):
+                afficher(future.result())
+    
+    echecs = [r for r in resultats if r['statut'] != 'ok']
+    print(f"\n{len(resultats) - len(echecs)} réussi(s), {len(echecs)} échec(s) "
+          f"en {time.perf_counter() - debut:.1f} s")
+    return 1 if echecs or introuvables else 0
 
 
 if __name__ == "__main__":
-    # Exemple d'utilisation
-    print("Ce module doit être importé, pas exécuté directement.")
-    print("Utilisez: from heatmap_generator_generic import HeatmapGenerator")
+    sys.exit(main())
@@ -8,9 +8,10 @@ Version: 2.0
 
 import streamlit as st
 import pandas as pd
-import numpy as np
 from io import BytesIO
-import sys
+import hashlib
+import threading
+import time
 
 # Configuration de la page
 st.set_page_config(
@@ -74,11 +75,174 @@ st.markdown("""
 
 # Importer le générateur de heatmaps
 try:
-    from heatmap_generator_generic_v2 import HeatmapGenerator
+    from heatmap_generator_generic_v2 import (FOLD_CHANGES, NORMALISATIONS, STATISTIQUES,
+                                              GenerationAnnulee, HeatmapGenerator, analyser_colonnes,
+                                              lire_tableau, palettes_disponibles)
 except ImportError:
     st.error("⚠️ Erreur : Le module heatmap_generator_generic_v2.py est introuvable. Assurez-vous qu'il est dans le même dossier.")
     st.stop()
 
+# Cache des étapes coûteuses, indexé par l'empreinte du contenu uploadé :
+# les réexécutions du script (interactions avec les widgets) ne relisent pas le fichier
+DUREE_CACHE = 3600  # secondes
+
+
+def empreinte_upload(fichier):
+    """
+    Empreinte SHA-256 du contenu d'un fichier uploadé
+    
+    Calculée une fois par upload (file_id) et conservée dans la session :
+    les réexécutions du script ne rehachent pas tout le fichier.
+    """
+    file_id = getattr(fichier, 'file_id', None)
+    memorisee = st.session_state.get('empreinte_upload')
+    if file_id is not None and memorisee is not None and memorisee[0] == file_id:
+        return memorisee[1]
+    empreinte = hashlib.sha256(fichier.getvalue()).hexdigest()
+    st.session_state['empreinte_upload'] = (file_id, empreinte)
+    return empreinte
+
+
+@st.cache_data(max_entries=8, ttl=DUREE_CACHE, show_spinner=False)
+def charger_tableau(empreinte, _fichier, colonne_x):
+    """
+    Lit le fichier uploadé (une seule fois par contenu et colonne X)
+    
+    La colonne X est transmise au lecteur : pour Parquet, Feather et Arrow,
+    seules elle et les colonnes de données sont lues.
+    """
+    return lire_tableau(_fichier, colonne_x=colonne_x, afficher=None)
+
+
+@st.cache_data(max_entries=8, ttl=DUREE_CACHE, show_spinner=False)
+def calculer_generateur(empreinte, _df, colonne_x, _progression=None):
+    """
+    Charge les données et calcule les matrices (une seule fois par contenu et colonne X)
+    
+    Le schéma des colonnes est lui-même mis en cache par analyser_colonnes.
+    Chaque appel reçoit une copie du générateur : les sessions restent isolées.
+    Le callback de progression n'intervient que si le calcul est effectué.
+    """
+    generator = HeatmapGenerator(_df, {'colonne_x': colonne_x, 'verbeux': False},
+                                 progression=_progression)
+    generator.charger_donnees()
+    generator.calculer_matrices()
+    return generator
+
+
+DPI_APERCU = 60  # Miniatures de l'aperçu : basse résolution, rendu quasi instantané
+APERCU_COLONNES = 3
+# Réglages dont dépendent les miniatures (étapes transformation et rendu ;
+# dpi et moteur sont imposés) : les autres ne font pas partie de la clé du cache
+CLES_APERCU = tuple(
+    cle for cle in ('colonne_x',) + HeatmapGenerator.DEPENDANCES_CONFIG['transformation']
+    + HeatmapGenerator.DEPENDANCES_CONFIG['rendu'] if cle not in ('dpi', 'moteur_rendu'))
+
+
+@st.cache_data(max_entries=64, ttl=DUREE_CACHE, show_spinner=False)
+def calculer_miniatures(empreinte, _df, config, page, par_page):
+    """
+    Rend les miniatures d'une page de l'aperçu : seuls ses marqueurs sont rendus
+    
+    Part des matrices déjà calculées par calculer_generateur ; seule la
+    transformation est refaite pour la configuration courante. Chaque page
+    est mise en cache par contenu, configuration et numéro : revenir sur une
+    page ou à un réglage déjà essayé est immédiat. config ne contient que
+    les réglages de CLES_APERCU : changer le titre ou la mise en page de la
+    présentation ne refait aucune miniature.
+    
+    Retourne:
+        tuple: (marqueurs de la page, PNG de chacun)
+    """
+    generator = calculer_generateur(empreinte, _df, config['colonne_x'])
+    generator.modifier_config(**dict(config, dpi=DPI_APERCU, moteur_rendu='raster'))
+    generator.transformer_matrices()
+    marqueurs = generator.ordre_marqueurs[page * par_page:(page + 1) * par_page]
+    return marqueurs, [generator.creer_heatmap(marqueur).getvalue() for marqueur in marqueurs]
+
+
+# Part de la barre de progression attribuée à chaque étape (début, fin)
+PROGRESSION_ETAPES = {
+    'chargement': (0.00, 0.05),
+    'matrices': (0.05, 0.15),
+    'transformation': (0.15, 0.20),
+    'rendu': (0.20, 0.95),
+    'assemblage': (0.95, 1.00),
+}
+
+LIBELLES_ETAPES = {
+    'chargement': "📊 Chargement des données",
+    'matrices': "🧮 Calcul des matrices",
+    'transformation': "📐 Transformation des valeurs",
+    'rendu': "🎨 Rendu des heatmaps",
+    'assemblage': "📑 Assemblage du PowerPoint",
+}
+
+
+def lancer_generation(empreinte, df, config):
+    """
+    Lance la génération dans un thread d'arrière-plan
+    
+    Retourne un dictionnaire d'état (étape, avancement, résultat, erreur),
+    mis à jour par le thread et lu par le script à chaque réexécution.
+    Le PowerPoint (ou l'archive ZIP des parties) est produit en mémoire
+    (job['pptx']) : aucun fichier partagé entre les sessions.
+    L'annulation est demandée en passant job['annule'] à True : le
+    générateur s'interrompt au point de progression suivant.
+    """
+    job = {
+        'empreinte': empreinte,
+        'etape': None, 'fait': 0, 'total': None,
+        'debut': time.time(), 'debut_etape': time.time(),
+        'annule': False, 'annulee': False,
+        'generator': None, 'pptx': None, 'erreur': None,
+        'affiche': False,
+    }
+    
+    def progression(etape, fait, total):
+        if job['annule']:
+            raise GenerationAnnulee("Génération annulée par l'utilisateur")
+        if etape != job['etape']:
+            job['debut_etape'] = time.time()
+        job.update(etape=etape, fait=fait, total=total)
+    
+    def executer():
+        try:
+            generator = calculer_generateur(empreinte, df, config['colonne_x'], progression)
+            generator.progression = progression
+            generator.modifier_config(**config)
+            sortie = BytesIO()
+            generator.generer(sortie)
+            job['pptx'] = sortie.getvalue()
+            job['generator'] = generator
+        except GenerationAnnulee:
+            job['annulee'] = True
+        except Exception as e:
+            job['erreur'] = e
+    
+    job['thread'] = threading.Thread(target=executer, daemon=True)
+    job['thread'].start()
+    return job
+
+
+def avancement(job):
+    """
+    Fraction globale d'avancement et temps restant estimé (s) pour l'étape en cours
+    """
+    if job['etape'] is None:
+        return 0.0, None
+    debut, fin = PROGRESSION_ETAPES[job['etape']]
+    if not job['total']:
+        return debut, None
+    part = min(job['fait'] / job['total'], 1.0)
+    restant = None
+    if job['fait']:
+        # Durée moyenne par élément de l'étape, extrapolée aux éléments restants
+        ecoule = time.time() - job['debut_etape']
+        restant = ecoule / job['fait'] * (job['total'] - job['fait'])
+    return debut + (fin - debut) * part, restant
+
+
 # Titre principal
 st.markdown('<div class="main-header">🔥 Générateur de Heatmaps</div>', unsafe_allow_html=True)
 st.markdown('<div class="sub-header">Transformez vos données Excel en heatmaps PowerPoint professionnelles</div>', unsafe_allow_html=True)
@@ -91,7 +255,7 @@ with st.sidebar:
     st.subheader("🎨 Palette de couleurs")
     palette = st.selectbox(
         "Choisissez une palette :",
-        options=['rouge', 'bleu', 'vert', 'viridis', 'plasma', 'inferno', 'magma', 'cividis'],
+        options=palettes_disponibles(),
         index=0,
         help="Viridis et cividis sont recommandés pour les publications scientifiques (colorblind-friendly)"
     )
@@ -116,6 +280,30 @@ with st.sidebar:
     afficher_valeurs = st.checkbox("Afficher les valeurs dans les cellules", value=True)
     echelle_log = st.checkbox("Utiliser échelle logarithmique", value=True, 
                               help="Recommandé pour des données avec large plage de valeurs")
+    normalisation = st.selectbox(
+        "Normalisation par marqueur", options=[None] + list(NORMALISATIONS),
+        format_func=lambda mode: "Aucune" if mode is None else NORMALISATIONS[mode],
+        help="Remplace l'échelle logarithmique pour les couleurs ; les valeurs affichées restent brutes"
+    )
+    libelles_statistiques = {'moyenne': "Moyenne", 'mediane': "Médiane", 'ecart_type': "Écart-type",
+                             'sem': "Erreur standard (SEM)", 'n': "Nombre de réplicats (n)"}
+    statistique = st.selectbox(
+        "Statistique des couleurs", options=list(STATISTIQUES),
+        format_func=libelles_statistiques.get,
+        help="Calculée sur les réplicats ; les lignes de même valeur X sont regroupées"
+    )
+    statistique_valeurs = st.selectbox(
+        "Statistique des valeurs affichées", options=list(STATISTIQUES),
+        index=STATISTIQUES.index(statistique), format_func=libelles_statistiques.get,
+        disabled=not afficher_valeurs
+    )
+    
+    regroupement = st.multiselect(
+        "Regroupement hiérarchique", options=['lignes', 'groupes', 'marqueurs'],
+        format_func={'lignes': "Valeurs X", 'groupes': "Groupes", 'marqueurs': "Marqueurs"}.get,
+        help="Réordonne les lignes et colonnes de chaque heatmap et/ou les heatmaps entre elles"
+    )
+    dendrogrammes = st.checkbox("Afficher les dendrogrammes", value=False, disabled=not regroupement)
     
     st.divider()
     
@@ -127,6 +315,28 @@ with st.sidebar:
                                     help="Ex: 'Temps (heures)' ou 'Concentration (ng/mL)'")
         max_heatmaps = st.slider("Heatmaps max par slide", min_value=1, max_value=9, value=6)
         titre_pres = st.text_input("Titre présentation", value="Analyse des résultats expérimentaux")
+        moteur_rendu = st.selectbox(
+            "Moteur de rendu",
+            options=['matplotlib', 'reutilisation', 'raster'],
+            index=0,
+            help="'raster' : rendu direct très rapide, utilisé quand les valeurs sont masquées"
+        )
+        heatmaps_natives = st.checkbox(
+            "Heatmaps PowerPoint natives (modifiables)", value=False,
+            help="Tableaux colorés dessinés dans PowerPoint au lieu d'images : fichier plus léger, net à tout zoom"
+        )
+        planches_composites = st.checkbox(
+            "Une seule image par slide", value=False,
+            help="Rend toutes les heatmaps d'un slide dans une même figure (plus rapide pour les grands jeux)"
+        )
+        echelle_commune = st.checkbox(
+            "Échelle de couleurs commune par slide", value=False, disabled=not planches_composites,
+            help="Avec une image par slide : même échelle et une seule colorbar"
+        )
+        marqueurs_par_fichier = st.number_input(
+            "Marqueurs max par fichier (0 = un seul fichier)", min_value=0, value=0, step=100,
+            help="Très grands jeux : plusieurs PowerPoint réunis dans une archive ZIP, mémoire bornée"
+        )
     
     st.divider()
     
@@ -142,27 +352,26 @@ with tab1:
     # Upload fichier
     uploaded_file = st.file_uploader(
         "Glissez-déposez votre fichier Excel ici ou cliquez pour parcourir",
-        type=['xlsx', 'xls'],
+        type=['xlsx', 'xls', 'csv', 'parquet', 'feather', 'arrow'],
         help="Format requis : Colonne A = variable (Temps, Dose, etc.), Colonnes B+ = Marqueur_Groupe_Réplicat"
     )
     
     if uploaded_file is not None:
-        # Sauvegarder temporairement le fichier
-        temp_file_path = f"temp_{uploaded_file.name}"
-        with open(temp_file_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
-        
         st.success(f"✅ Fichier uploadé : {uploaded_file.name}")
         
         # Prévisualisation des données
         st.header("🔍 Étape 2 : Prévisualisation")
         
         try:
-            # Lire le fichier
-            try:
-                df = pd.read_excel(temp_file_path, sheet_name='Données')
-            except:
-                df = pd.read_excel(temp_file_path, sheet_name=0)
+            # Lire le fichier (une seule fois par contenu : le DataFrame est transmis au générateur)
+            empreinte = empreinte_upload(uploaded_file)
+            df = charger_tableau(empreinte, uploaded_file, colonne_x if colonne_x else None)
+            
+            # Colonne X résolue comme par le générateur (saisie, sinon première colonne)
+            nom_colonne_x = colonne_x if colonne_x else df.columns[0]
+            if nom_colonne_x not in df.columns:
+                raise ValueError(f"Colonne X '{nom_colonne_x}' introuvable. "
+                                 f"Colonnes disponibles : {list(df.columns)}")
             
             col1, col2 = st.columns(2)
             
@@ -171,18 +380,14 @@ with tab1:
                 st.metric("Nombre de colonnes", df.shape[1])
             
             with col2:
-                # Détecter marqueurs
-                colonnes_donnees = [col for col in df.columns if col != df.columns[0]]
-                marqueurs = set()
-                for col in colonnes_donnees:
-                    for sep in ['_', '-', '.']:
-                        if sep in col:
-                            marqueurs.add(col.split(sep)[0])
-                            break
+                # Détecter marqueurs (schéma partagé avec le générateur)
+                colonnes_donnees = [col for col in df.columns if col != nom_colonne_x]
+                schema = analyser_colonnes(df.columns, nom_colonne_x)
+                marqueurs = schema.marqueurs
                 
                 st.metric("Marqueurs détectés", len(marqueurs))
                 if marqueurs:
-                    st.caption(f"Marqueurs : {', '.join(sorted(marqueurs))}")
+                    st.caption(f"Marqueurs : {', '.join(marqueurs)}")
             
             # Afficher aperçu
             with st.expander("👁️ Voir les premières lignes"):
@@ -195,11 +400,8 @@ with tab1:
             messages = []
             
             # Vérifier séparateurs
-            has_separator = False
-            for col in colonnes_donnees[:5]:  # Vérifier les 5 premières
-                if '_' in col or '-' in col or '.' in col:
-                    has_separator = True
-                    break
+            # Vérifier les 5 premières colonnes de données
+            has_separator = any(m is not None for m in schema.marqueur[1:6])
             
             if has_separator:
                 st.success("✅ Format détecté : Colonnes avec séparateurs (_/-/.)")
@@ -228,76 +430,147 @@ with tab1:
             else:
                 st.markdown('<div class="warning-box">⚠️ <b>Format à corriger.</b> Consultez le guide ci-dessous.</div>', unsafe_allow_html=True)
             
+            # Aperçu basse résolution, avant la génération complète
+            st.header("🖼️ Étape 3 : Aperçu des heatmaps")
+            
+            # Référence des fold changes : un groupe ou une valeur X du fichier
+            groupe_reference = x_reference = None
+            if normalisation in FOLD_CHANGES:
+                col_axe, col_reference = st.columns(2)
+                with col_axe:
+                    axe_reference = st.radio("Référence du fold change", ["Groupe", "Valeur X"],
+                                             horizontal=True)
+                with col_reference:
+                    if axe_reference == "Groupe":
+                        groupe_reference = st.selectbox("Groupe de référence", schema.groupes)
+                    else:
+                        valeurs_x = HeatmapGenerator._nettoyer_lignes(df, nom_colonne_x)[nom_colonne_x]
+                        x_reference = st.selectbox("Valeur X de référence", pd.unique(valeurs_x).tolist())
+            
+            # Configuration (partagée par l'aperçu et la génération)
+            config = {
+                'colonne_x': colonne_x if colonne_x else None,
+                'label_axe_x': label_axe_x if label_axe_x else None,
+                'echelle_log': echelle_log,
+                'statistique': statistique,
+                'statistique_valeurs': statistique_valeurs,
+                'normalisation': normalisation,
+                'groupe_reference': groupe_reference,
+                'x_reference': x_reference,
+                'max_heatmaps_par_slide': max_heatmaps,
+                'titre_presentation': titre_pres,
+                'moteur_rendu': moteur_rendu,
+                'heatmaps_natives': heatmaps_natives,
+                'planches_composites': planches_composites,
+                'echelle_commune': echelle_commune,
+                'marqueurs_par_fichier': marqueurs_par_fichier or None,
+                'clustering_lignes': 'lignes' in regroupement,
+                'clustering_groupes': 'groupes' in regroupement,
+                'clustering_marqueurs': 'marqueurs' in regroupement,
+                'dendrogrammes': dendrogrammes,
+                'afficher_valeurs': afficher_valeurs,
+                'palette': palette
+            }
+            
+            if st.checkbox("Afficher l'aperçu", value=True,
+                           help="Miniatures basse résolution : ajustez palette et échelle avant de générer"):
+                col_page, col_par_page = st.columns(2)
+                with col_par_page:
+                    par_page = st.selectbox("Heatmaps par page", [6, 12, 24])
+                n_pages = max(1, -(-len(marqueurs) // par_page))
+                with col_page:
+                    page = st.number_input(f"Page (sur {n_pages})", min_value=1, max_value=n_pages,
+                                           value=1, step=1)
+                try:
+                    with st.spinner("Rendu des miniatures..."):
+                        noms, miniatures = calculer_miniatures(
+                            empreinte, df, {cle: config[cle] for cle in CLES_APERCU if cle in config},
+                            page - 1, par_page)
+                    colonnes = st.columns(APERCU_COLONNES)
+                    for k, (nom, png) in enumerate(zip(noms, miniatures)):
+                        with colonnes[k % APERCU_COLONNES]:
+                            st.image(png, caption=nom)
+                except Exception as e:
+                    st.warning(f"⚠️ Aperçu indisponible : {e}")
+            
             # Bouton de génération
-            st.header("🚀 Étape 3 : Génération")
+            st.header("🚀 Étape 4 : Génération")
+            
+            job = st.session_state.get('generation')
+            if job is not None and job['empreinte'] != empreinte:
+                job = None  # Génération lancée sur un autre fichier
+            en_cours = job is not None and job['thread'].is_alive()
+            
+            if st.button("🔥 GÉNÉRER LES HEATMAPS", type="primary", disabled=en_cours):
+                # La génération tourne en arrière-plan : le script se contente
+                # d'afficher son avancement à chaque réexécution
+                job = lancer_generation(empreinte, df, config)
+                st.session_state['generation'] = job
+                en_cours = True
+            
+            if job is not None and en_cours:
+                # Afficher progression
+                fraction, restant = avancement(job)
+                if job['etape'] is None:
+                    texte = "🔄 Démarrage de la génération..."
+                else:
+                    texte = LIBELLES_ETAPES[job['etape']]
+                    if job['total']:
+                        texte += f" : {job['fait']}/{job['total']}"
+                    if restant is not None:
+                        texte += f" — environ {restant:.0f} s restantes"
+                st.progress(fraction, text=texte)
+                st.caption(f"⏱️ Temps écoulé : {time.time() - job['debut']:.0f} s")
+                
+                if st.button("⏹️ Annuler la génération", disabled=job['annule']):
+                    job['annule'] = True
+                    st.warning("⏳ Annulation en cours...")
+                
+                # Interroger à nouveau le thread de génération
+                time.sleep(0.5)
+                st.rerun()
             
-            if st.button("🔥 GÉNÉRER LES HEATMAPS", type="primary"):
-                with st.spinner("🔄 Génération en cours... Veuillez patienter."):
-                    try:
-                        # Configuration
-                        config = {
-                            'colonne_x': colonne_x if colonne_x else None,
-                            'label_axe_x': label_axe_x if label_axe_x else None,
-                            'echelle_log': echelle_log,
-                            'max_heatmaps_par_slide': max_heatmaps,
-                            'titre_presentation': titre_pres
-                        }
-                        
-                        # Créer générateur
-                        generator = HeatmapGenerator(temp_file_path, config)
-                        
-                        # Afficher progression
-                        progress_bar = st.progress(0)
-                        status_text = st.empty()
-                        
-                        # Charger données
-                        status_text.text("📊 Chargement des données...")
-                        progress_bar.progress(20)
-                        generator.charger_donnees()
-                        
-                        # Calculer matrices
-                        status_text.text("🧮 Calcul des matrices...")
-                        progress_bar.progress(50)
-                        generator.calculer_matrices()
-                        
-                        # Créer présentation
-                        status_text.text("🎨 Création des heatmaps...")
-                        progress_bar.progress(75)
-                        output_file = "Heatmaps_Generated.pptx"
-                        generator.creer_presentation(output_file, 
-                                                    afficher_valeurs=afficher_valeurs,
-                                                    palette=palette)
-                        
-                        progress_bar.progress(100)
-                        status_text.text("✅ Terminé !")
-                        
-                        # Succès
+            elif job is not None:
+                if job['annulee']:
+                    st.warning("⏹️ Génération annulée.")
+                elif job['erreur'] is not None:
+                    st.error(f"❌ Erreur lors de la génération : {str(job['erreur'])}")
+                    st.exception(job['erreur'])
+                else:
+                    generator = job['generator']
+                    
+                    # Succès (animation une seule fois par génération)
+                    if not job['affiche']:
                         st.balloons()
-                        st.success("🎉 **PowerPoint créé avec succès !**")
-                        
-                        # Statistiques
-                        col1, col2, col3 = st.columns(3)
-                        with col1:
-                            st.metric("Marqueurs", len(generator.marqueurs))
-                        with col2:
-                            st.metric("Groupes", len(generator.groupes))
-                        with col3:
-                            st.metric("Points mesurés", len(generator.valeurs_x))
-                        
-                        # Bouton de téléchargement
-                        with open(output_file, "rb") as file:
-                            st.download_button(
-                                label="📥 TÉLÉCHARGER LE POWERPOINT",
-                                data=file,
-                                file_name=f"Heatmaps_{uploaded_file.name.split('.')[0]}.pptx",
-                                mime="application/vnd.openxmlformats-officedocument.presentationml.presentation"
-                            )
-                        
-                        st.info("💡 Le fichier PowerPoint contient toutes vos heatmaps. Ouvrez-le dans PowerPoint ou Google Slides !")
-                        
-                    except Exception as e:
-                        st.error(f"❌ Erreur lors de la génération : {str(e)}")
-                        st.exception(e)
+                        job['affiche'] = True
+                    st.success("🎉 **PowerPoint créé avec succès !**")
+                    
+                    # Statistiques
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric("Marqueurs", len(generator.marqueurs))
+                    with col2:
+                        st.metric("Groupes", len(generator.groupes))
+                    with col3:
+                        st.metric("Points mesurés", len(generator.valeurs_x))
+                    
+                    # Bouton de téléchargement (archive ZIP si la présentation est découpée)
+                    if generator.config['marqueurs_par_fichier']:
+                        st.download_button(
+                            label="📥 TÉLÉCHARGER LES POWERPOINT (ZIP)",
+                            data=job['pptx'],
+                            file_name=f"Heatmaps_{uploaded_file.name.split('.')[0]}.zip",
+                            mime="application/zip"
+                        )
+                    else:
+                        st.download_button(
+                            label="📥 TÉLÉCHARGER LE POWERPOINT",
+                            data=job['pptx'],
+                            file_name=f"Heatmaps_{uploaded_file.name.split('.')[0]}.pptx",
+                            mime="application/vnd.openxmlformats-officedocument.presentationml.presentation"
+                        )
+                    
+                    st.info("💡 Le fichier PowerPoint contient toutes vos heatmaps. Ouvrez-le dans PowerPoint ou Google Slides !")
         
         except Exception as e:
             st.error(f"❌ Erreur lors de la lecture du fichier : {str(e)}")
@@ -0,0 +1,274 @@
+"""
+Tests du générateur de heatmaps (pytest)
+
+Lancer avec : python -m pytest -q
+"""
+
+import os
+import zipfile
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.cluster.hierarchy import leaves_list, linkage
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE_TYPE
+from scipy.spatial.distance import pdist
+
+import heatmap_generator_generic_v2 as hg
+
+
+@pytest.fixture
+def donnees():
+    """
+    Petit jeu de données : 5 valeurs X × 3 groupes × 2 réplicats, 4 marqueurs
+    """
+    rng = np.random.default_rng(0)
+    colonnes = {'Temps': [0, 6, 24, 48, 72]}
+    for marqueur in ('IL2', 'IL6', 'TNFa', 'IFNg'):
+        for groupe in ('PBS', 'OKT3', 'Blina'):
+            for replicat in (1, 2):
+                colonnes[f'{marqueur}_{groupe}_{replicat}'] = rng.uniform(1, 1000, 5)
+    return pd.DataFrame(colonnes)
+
+
+@pytest.fixture
+def rendus(monkeypatch):
+    """
+    Enregistre, dans l'ordre de rendu, les données reçues par rendre_heatmap
+    (titre → valeurs des couleurs, valeurs X, groupes)
+    """
+    enregistres = {}
+    rendre = hg.rendre_heatmap
+
+    def espion(matrice, titre, valeurs_x, groupes, *args, **kwargs):
+        png = rendre(matrice, titre, valeurs_x, groupes, *args, **kwargs)
+        matrice_plot = args[4] if len(args) > 4 else kwargs.get('matrice_plot')
+        enregistres[titre] = (np.array(matrice_plot), list(valeurs_x), list(groupes))
+        return png
+
+    monkeypatch.setattr(hg, 'rendre_heatmap', espion)
+    return enregistres
+
+
+def _generateur(donnees, **config):
+    # Flux historique : chargement et matrices, sans transformer_matrices()
+    generator = hg.HeatmapGenerator(donnees, dict({'verbeux': False, 'dpi': 30}, **config))
+    generator.charger_donnees()
+    generator.calculer_matrices()
+    return generator
+
+
+def test_normalisation_appliquee_sans_transformer_matrices(donnees, rendus):
+    generator = _generateur(donnees, normalisation='zscore_lignes')
+    generator.creer_presentation()
+
+    attendu = hg.normaliser(generator.statistiques['moyenne'], 'zscore_lignes')
+    assert list(rendus) == generator.marqueurs
+    for k, marqueur in enumerate(generator.marqueurs):
+        matrice_plot = rendus[marqueur][0]
+        np.testing.assert_allclose(matrice_plot, attendu[k])
+        # z-score par valeur X : chaque ligne est centrée réduite
+        np.testing.assert_allclose(matrice_plot.mean(axis=1), 0, atol=1e-12)
+        np.testing.assert_allclose(matrice_plot.std(axis=1), 1)
+
+
+def test_creer_heatmap_normalise_sans_transformer_matrices(donnees, rendus):
+    generator = _generateur(donnees, normalisation='minmax')
+    generator.creer_heatmap('IL6')
+
+    matrice_plot = rendus['IL6'][0]
+    assert matrice_plot.min() == 0 and matrice_plot.max() == 1
+
+
+def test_regroupement_applique_sans_transformer_matrices(donnees, rendus):
+    generator = _generateur(donnees, clustering_lignes=True, clustering_groupes=True,
+                            clustering_marqueurs=True)
+    generator.creer_presentation()
+
+    valeurs = np.log10(generator.statistiques['moyenne'] + 1)
+    ordre_marqueurs = leaves_list(linkage(pdist(valeurs.reshape(len(valeurs), -1)), 'average'))
+    assert list(rendus) == [generator.marqueurs[k] for k in ordre_marqueurs]
+
+    for k, marqueur in enumerate(generator.marqueurs):
+        matrice_plot, valeurs_x, groupes = rendus[marqueur]
+        lignes = leaves_list(linkage(pdist(valeurs[k]), 'average'))
+        colonnes = leaves_list(linkage(pdist(valeurs[k].T), 'average'))
+        assert valeurs_x == [generator.valeurs_x[i] for i in lignes]
+        assert groupes == [generator.groupes[j] for j in colonnes]
+        np.testing.assert_allclose(matrice_plot, valeurs[k][np.ix_(lignes, colonnes)])
+
+
+def test_lecture_par_blocs_types_x_melanges(tmp_path):
+    # Un bloc purement numérique et un bloc avec une note : même valeur X '6'
+    fichier = tmp_path / 'mixte.csv'
+    fichier.write_text("Temps,IL2_PBS_1,IL2_PBS_2\n0,1,2\n6,3,4\n12,5,6\n6,7,8\nNote : relecture,,\n")
+    complet = _generateur(str(fichier))
+    blocs = _generateur(str(fichier), lecture_par_blocs=3)
+
+    assert [str(v) for v in blocs.valeurs_x] == [str(v) for v in complet.valeurs_x] == ['0', '6', '12']
+    np.testing.assert_allclose(blocs.statistiques['moyenne'], complet.statistiques['moyenne'])
+    np.testing.assert_allclose(blocs.statistiques['moyenne'][0, :, 0], [1.5, 5.5, 5.5])
+
+
+def test_lecture_par_blocs_ecart_type_valeurs_decalees(tmp_path):
+    # Réplicats autour de 1e9 avec un écart-type de l'ordre de 0.005 :
+    # les sommes des carrés brutes s'annulent, la fusion des moments non
+    rng = np.random.default_rng(1)
+    temps = np.repeat([0, 6, 24], 4)
+    colonnes = {'Temps': temps}
+    for groupe in ('PBS', 'OKT3'):
+        for replicat in (1, 2, 3):
+            colonnes[f'IL2_{groupe}_{replicat}'] = 1e9 + rng.normal(0, 0.005, len(temps))
+    fichier = tmp_path / 'decale.csv'
+    pd.DataFrame(colonnes).sample(frac=1, random_state=0).to_csv(fichier, index=False, float_format='%.6f')
+
+    complet = _generateur(str(fichier))
+    blocs = _generateur(str(fichier), lecture_par_blocs=5)
+    for nom in ('moyenne', 'ecart_type', 'sem', 'n'):
+        np.testing.assert_allclose(blocs.statistiques[nom], complet.statistiques[nom], rtol=1e-4)
+    assert np.all(blocs.statistiques['ecart_type'] > 0.001)
+
+
+def test_cache_images_succes_echecs_et_eviction(tmp_path, monkeypatch):
+    cache = hg.CacheImages(str(tmp_path), taille_max=1000)
+    assert not cache.contient('a') and cache.lire('a') is None
+    cache.ecrire('a', b'x' * 300)
+    assert cache.contient('a') and cache.lire('a') == b'x' * 300
+    assert (cache.succes, cache.echecs) == (1, 1)
+
+    # Au-delà du plafond : éviction des moins récemment utilisées jusqu'au seuil bas
+    for k, cle in enumerate('bcd'):
+        os.utime(tmp_path / 'a.png', (k, k))
+        cache.ecrire(cle, b'x' * 300)
+    assert sorted(p.stem for p in tmp_path.glob('*.png')) == ['b', 'c', 'd']
+    assert cache.statistiques()['taille'] == 900
+
+    # Sous le seuil bas, les écritures suivantes ne reparcourent pas le dossier
+    parcours = []
+    entrees = cache._entrees
+    monkeypatch.setattr(cache, '_entrees', lambda: parcours.append(1) or entrees())
+    cache.ecrire('e', b'x' * 50)
+    assert not parcours
+    cache.ecrire('f', b'x' * 100)
+    assert len(parcours) == 1
+    assert cache.statistiques()['taille'] <= 0.9 * cache.taille_max
+
+
+def test_presentation_decoupee_en_archive(donnees, rendus, tmp_path):
+    generator = hg.HeatmapGenerator(donnees, {'verbeux': False, 'dpi': 30,
+                                              'max_heatmaps_par_slide': 2})
+    generator.generer(BytesIO())
+    assert len(generator.images) == 4
+
+    # Découpage activé après un rendu complet : images libérées, parties rendues à l'assemblage
+    rendus.clear()
+    generator.modifier_config(marqueurs_par_fichier=2)
+    contenu = generator.creer_presentation()
+    assert generator.images == {}
+    assert list(rendus) == generator.marqueurs
+
+    with zipfile.ZipFile(BytesIO(contenu)) as archive:
+        noms = archive.namelist()
+        assert noms == ['Heatmaps_partie_001.pptx', 'Heatmaps_partie_002.pptx']
+        for k, nom in enumerate(noms):
+            prs = Presentation(BytesIO(archive.read(nom)))
+            slides = list(prs.slides)
+            assert len(slides) == 2
+            assert slides[1].shapes[0].text == f"Heatmaps - Marqueurs {2 * k + 1} à {2 * k + 2}"
+            assert sum(forme.shape_type == MSO_SHAPE_TYPE.PICTURE for forme in slides[1].shapes) == 2
+
+    with pytest.raises(ValueError, match='.zip'):
+        generator.creer_presentation(str(tmp_path / 'heatmaps.pptx'))
+    assert not os.path.exists(tmp_path / 'heatmaps.pptx')
+
+
+def test_schema_partage_non_modifie_par_le_generateur(donnees):
+    generator = _generateur(donnees)
+    generator.marqueurs.remove('IL6')
+    generator.groupes.reverse()
+
+    schema = hg.analyser_colonnes(list(donnees.columns), 'Temps')
+    assert schema.marqueurs == ('IFNg', 'IL2', 'IL6', 'TNFa')
+    assert schema.groupes == ('Blina', 'OKT3', 'PBS')
+
+
+def test_statistique_calculee_a_la_demande(donnees, tmp_path):
+    generator = hg.HeatmapGenerator(donnees, {'verbeux': False, 'statistique': 'mediane'})
+    with pytest.raises(ValueError, match='non chargées'):
+        generator.transformer_matrices()
+    generator.charger_donnees()
+    generator.transformer_matrices()
+    assert 'mediane' in generator.statistiques
+
+    # La médiane n'est indisponible qu'après une lecture par blocs
+    fichier = tmp_path / 'donnees.csv'
+    donnees.to_csv(fichier, index=False)
+    generator = hg.HeatmapGenerator(str(fichier), {'verbeux': False, 'lecture_par_blocs': 2,
+                                                   'statistique': 'mediane'})
+    generator.charger_donnees()
+    with pytest.raises(ValueError, match='lecture par blocs'):
+        generator.transformer_matrices()
+
+
+@pytest.mark.parametrize('valeur', [0, -2, 10, 2.5, True])
+def test_max_heatmaps_par_slide_invalide(donnees, valeur):
+    with pytest.raises(ValueError, match='max_heatmaps_par_slide'):
+        hg.HeatmapGenerator(donnees, {'max_heatmaps_par_slide': valeur})
+
+    generator = hg.HeatmapGenerator(donnees, {'verbeux': False})
+    with pytest.raises(ValueError, match='max_heatmaps_par_slide'):
+        generator.modifier_config(max_heatmaps_par_slide=valeur)
+    assert generator.config['max_heatmaps_par_slide'] == 6
+
+
+@pytest.mark.parametrize('valeur', ['0', '-1', '10', 'six'])
+def test_ligne_de_commande_max_par_slide_invalide(valeur, capsys):
+    with pytest.raises(SystemExit) as sortie:
+        hg.main(['donnees.csv', '--max-par-slide', valeur])
+    assert sortie.value.code == 2
+    assert '--max-par-slide' in capsys.readouterr().err
+
+
+@pytest.mark.parametrize('taille_bloc', [1, 3, 7, 1000])
+def test_lecture_par_blocs_identique_a_la_lecture_complete(tmp_path, taille_bloc):
+    # Valeurs X répétées hors de tout ordre, réplicats manquants
+    rng = np.random.default_rng(2)
+    colonnes = {'Dose': rng.choice([0.1, 1, 10, 100], 25)}
+    for marqueur in ('IL2', 'IL6'):
+        for groupe in ('PBS', 'OKT3'):
+            for replicat in (1, 2, 3):
+                valeurs = rng.lognormal(3, 1, 25)
+                valeurs[rng.random(25) < 0.2] = np.nan
+                colonnes[f'{marqueur}_{groupe}_{replicat}'] = valeurs
+    fichier = tmp_path / 'doses.csv'
+    pd.DataFrame(colonnes).to_csv(fichier, index=False)
+
+    complet = _generateur(str(fichier))
+    blocs = _generateur(str(fichier), lecture_par_blocs=taille_bloc)
+    assert [str(v) for v in blocs.valeurs_x] == [str(v) for v in complet.valeurs_x]
+    assert (blocs.marqueurs, blocs.groupes) == (complet.marqueurs, complet.groupes)
+    for nom in ('moyenne', 'ecart_type', 'sem', 'n'):
+        np.testing.assert_allclose(blocs.statistiques[nom], complet.statistiques[nom])
+
+
+@pytest.mark.parametrize('format_source', ['parquet', 'feather', 'csv'])
+def test_lire_tableau_conserve_la_colonne_x(tmp_path, format_source):
+    # Colonne X hors de la première position, entourée de colonnes ignorées
+    df = pd.DataFrame({'Note': ['a', 'b', 'c'], 'Dose': [0.1, 1.0, 10.0],
+                       'IL2_PBS_1': [1.0, 2.0, 3.0], 'IL2_PBS_2': [4.0, 5.0, 6.0],
+                       'Commentaire': ['x', 'y', 'z']})
+    fichier = tmp_path / f'doses.{format_source}'
+    getattr(df, f'to_{format_source}')(fichier, **({'index': False} if format_source != 'feather' else {}))
+
+    for source in (str(fichier), fichier.read_bytes()):
+        lu = hg.lire_tableau(source, colonne_x='Dose', afficher=lambda *args: None)
+        assert 'Dose' in lu.columns
+        assert lu['Dose'].tolist() == [0.1, 1.0, 10.0]
+        if format_source != 'csv':
+            assert list(lu.columns) == ['Dose', 'IL2_PBS_1', 'IL2_PBS_2']
+
+    generator = _generateur(str(fichier), colonne_x='Dose')
+    assert generator.valeurs_x == [0.1, 1.0, 10.0]
+    np.testing.assert_allclose(generator.statistiques['moyenne'][0, :, 0], [2.5, 3.5, 4.5])